@@ -1,13 +1,163 @@
 
 from tkinter import *
 from tkinter import messagebox
-import pandas as pd
+import csv
+import math
+import os
+import queue
+import threading
 
 
 BLUE = "#00ccff"
 TEXT = "#003957"
 FONT = ("Roboto", 24, "bold")
 
+FISIER_CSV = "my_csv.csv"
+# punctele mai apropiate de atat sunt semnalate ca posibile duplicate
+PRAG_DUPLICAT_METRI = 100
+RAZA_PAMANT_METRI = 6371008.8
+# latura unei celule din grila de cautare (~1 km), mai mare decat pragul
+CELULA_GRADE = 0.01
+# dupa o eroare de scriere, lotul este reincercat la acest interval
+PAUZA_REINCERCARE_S = 2
+# cat de des verifica interfata starea scrierii
+INTERVAL_VERIFICARE_MS = 500
+
+# ---------------------------- SCRIEREA IN FUNDAL -------------------------------
+
+class ScriitorFundal(threading.Thread):
+    """
+    Scrie inregistrarile in CSV pe un fir separat, ca interfata sa nu se blocheze.
+    Inregistrarile sosite intre timp sunt scrise impreuna si fiecare lot este
+    fortat pe disc (fsync). Daca scrierea esueaza (fisier deschis in Excel, disc
+    plin), lotul nu se pierde: este pastrat si reincercat, impreuna cu randurile
+    noi, pana reuseste. Eroarea ramane in self.eroare pana la prima scriere reusita.
+    """
+
+    def __init__(self, fisier):
+        super().__init__(daemon=True)
+        self.fisier = fisier
+        self.coada = queue.Queue()
+        self.eroare = None
+        # randurile care asteapta o noua incercare
+        self.in_asteptare = 0
+        # randurile ramase nescrise la oprire
+        self.nesalvate = []
+
+    def adauga(self, rand):
+        self.coada.put(rand)
+
+    def opreste(self):
+        # None semnaleaza sfarsitul; asteptam sa fie scrise toate randurile
+        self.coada.put(None)
+        self.join()
+
+    def scrie(self, lot):
+        """Scrie lotul; intoarce randurile ramase nescrise (lista goala daca a reusit)."""
+        try:
+            with open(self.fisier, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(lot)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            self.eroare = e
+            self.in_asteptare = len(lot)
+            return lot
+        self.eroare = None
+        self.in_asteptare = 0
+        return []
+
+    def run(self):
+        lot = []
+        terminat = False
+        while not terminat:
+            # cu un lot nescris in asteptare nu blocam: reincercam dupa o pauza
+            try:
+                lot.append(self.coada.get(timeout=PAUZA_REINCERCARE_S if lot else None))
+            except queue.Empty:
+                pass
+            while True:
+                try:
+                    lot.append(self.coada.get_nowait())
+                except queue.Empty:
+                    break
+            if None in lot:
+                terminat = True
+                lot = [rand for rand in lot if rand is not None]
+            if lot:
+                lot = self.scrie(lot)
+        self.nesalvate = lot
+
+
+# ---------------------------- DETECTAREA DUPLICATELOR -------------------------------
+
+class IndexPuncte:
+    """Grila de celule cu punctele deja introduse, pentru cautarea rapida a vecinilor."""
+
+    def __init__(self):
+        self.celule = {}
+
+    @staticmethod
+    def celula(long, lat):
+        return math.floor(long / CELULA_GRADE), math.floor(lat / CELULA_GRADE)
+
+    def adauga(self, padure, long, lat):
+        self.celule.setdefault(self.celula(long, lat), []).append((padure, long, lat))
+
+    def cel_mai_apropiat(self, long, lat, prag_metri=PRAG_DUPLICAT_METRI):
+        """Intoarce (padure, distanta in metri) pentru cel mai apropiat punct sub prag, altfel None."""
+        cx, cy = self.celula(long, lat)
+        gasit = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for padure, p_long, p_lat in self.celule.get((cx + dx, cy + dy), ()):
+                    distanta = distanta_metri(long, lat, p_long, p_lat)
+                    if distanta <= prag_metri and (gasit is None or distanta < gasit[1]):
+                        gasit = (padure, distanta)
+        return gasit
+
+
+def distanta_metri(long1, lat1, long2, lat2):
+    """Distanta haversine intre doua puncte, in metri."""
+    long1, lat1, long2, lat2 = map(math.radians, (long1, lat1, long2, lat2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((long2 - long1) / 2) ** 2
+    return 2 * RAZA_PAMANT_METRI * math.asin(math.sqrt(a))
+
+
+def citeste_coordonate(long, lat):
+    """Transforma textul introdus in numere; intoarce None daca nu sunt coordonate valide."""
+    try:
+        return float(long.replace(",", ".")), float(lat.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def incarca_puncte(fisier):
+    """Incarca punctele deja salvate in CSV in index."""
+    index = IndexPuncte()
+    if os.path.exists(fisier):
+        with open(fisier, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header-ul
+            for rand in reader:
+                if len(rand) >= 4:
+                    coordonate = citeste_coordonate(rand[2], rand[3])
+                    if coordonate:
+                        index.adauga(rand[0], *coordonate)
+    return index
+
+
+def cauta_duplicat():
+    """Cauta, pe masura ce se tasteaza, o padure deja introdusa in apropiere."""
+    coordonate = citeste_coordonate(longitudine_entry.get(), latitudine_entry.get())
+    gasit = index_puncte.cel_mai_apropiat(*coordonate) if coordonate else None
+    if gasit:
+        avertizare.config(text=f"Atenție: {gasit[0]} este la {gasit[1]:.0f} m!")
+    else:
+        avertizare.config(text="")
+    return gasit
+
+
 # ---------------------------- SALVEAZA COORDONATELE -------------------------------
 
 def salveaza_datele():
@@ -17,26 +167,52 @@ def salveaza_datele():
     long = longitudine_entry.get()
     lat = latitudine_entry.get()
 
-    # variabila stocheaza informatiile sub forma de dictionar
-    noile_date = {"Name": [f"{padure}"],
-                  "Adress": [f"{localitate}"],
-                  "Longitude": [f"{long}"],
-                  "Latitude": [f"{lat}"]
-                  }
-    # am transformat datele intr-un DataFrame (df) cu Pandas
-    df = pd.DataFrame(noile_date)
-
     # am introdus alternativa atentionarii in caz ca user-ul nu completeaza campurile, am introdus datele in csv + am sters campurile
     if len(padure) == 0 or len(localitate) == 0 or len(long) == 0 or len(lat) == 0:
         messagebox.showinfo(title="Atenție", message="Completează toate câmpurile!!")
     else:
-        este_ok = messagebox.askokcancel(title=localitate, message=f"Ai introdus datele:\n Padure: {padure}\n Localitate: {localitate}\n Longitudine: {long}\n Latitudine: {lat}\n "f"Salvăm?")
+        gasit = cauta_duplicat()
+        mesaj_duplicat = f"\n ATENȚIE: {gasit[0]} este la {gasit[1]:.0f} m!\n" if gasit else ""
+        este_ok = messagebox.askokcancel(title=localitate, message=f"Ai introdus datele:\n Padure: {padure}\n Localitate: {localitate}\n Longitudine: {long}\n Latitudine: {lat}\n "f"{mesaj_duplicat}Salvăm?")
         if este_ok:
-            df.to_csv("my_csv.csv", mode='a', header=False, index=False)
+            # randul este scris in fundal, interfata ramane libera; daca scrierea esueaza,
+            # randul ramane in asteptare si eroarea apare in fereastra (verifica_salvarea)
+            scriitor.adauga([padure, localitate, long, lat])
+            coordonate = citeste_coordonate(long, lat)
+            if coordonate:
+                index_puncte.adauga(padure, *coordonate)
             padure_entry.delete(0, END)
             localitate_entry.delete(0, END)
             longitudine_entry.delete(0, END)
             latitudine_entry.delete(0, END)
+            avertizare.config(text="")
+
+
+def verifica_salvarea():
+    # afisam erorile scriitorului din fundal; mesajul dispare dupa prima scriere reusita
+    if scriitor.eroare:
+        stare_salvare.config(text=f"Eroare la salvare: {scriitor.eroare}\n"
+                                  f"{scriitor.in_asteptare} rânduri în așteptare, se reîncearcă automat.")
+    else:
+        stare_salvare.config(text="")
+    window.after(INTERVAL_VERIFICARE_MS, verifica_salvarea)
+
+
+def inchide_fereastra():
+    # asteptam sa fie scrise toate datele inainte de inchidere
+    scriitor.opreste()
+    nesalvate = scriitor.nesalvate
+    while nesalvate:
+        randuri = "\n".join(", ".join(rand) for rand in nesalvate)
+        if not messagebox.askretrycancel(title="Eroare", message=f"Aceste rânduri nu au putut fi salvate în {FISIER_CSV} ({scriitor.eroare}):\n{randuri}\n\nReîncercăm?"):
+            break
+        nesalvate = scriitor.scrie(nesalvate)
+    window.destroy()
+
+
+scriitor = ScriitorFundal(FISIER_CSV)
+scriitor.start()
+index_puncte = incarca_puncte(FISIER_CSV)
 
 # ---------------------------- INTERFATA PROGRAMULUI ------------------------------- #
 
@@ -85,6 +261,20 @@ longitudine_entry.grid(column=1, row=4, columnspan=2)
 latitudine_entry = Entry(width=40)
 latitudine_entry.grid(column=1, row=5, columnspan=2)
 
+# verificam duplicatele la fiecare tasta apasata in campurile de coordonate
+longitudine_entry.bind("<KeyRelease>", lambda event: cauta_duplicat())
+latitudine_entry.bind("<KeyRelease>", lambda event: cauta_duplicat())
+
+#AVERTIZAREA PENTRU DUPLICATE
+
+avertizare = Label(text="", bg=BLUE, fg="#b30000", font=("Roboto", 10, "bold"))
+avertizare.grid(column=1, row=7, columnspan=2)
+
+#STAREA SALVARII
+
+stare_salvare = Label(text="", bg=BLUE, fg="#b30000", font=("Roboto", 10, "bold"))
+stare_salvare.grid(column=1, row=8, columnspan=2)
+
 #NUMELE MEU
 
 nume_realizator = Label(text= "© DHL \n Constantin Răchită", bg=BLUE, font=("Roboto", 10))
@@ -96,4 +286,6 @@ adauga_coordonate.grid(column=1, row=6, columnspan=2)
 
 
 
+window.protocol("WM_DELETE_WINDOW", inchide_fereastra)
+window.after(INTERVAL_VERIFICARE_MS, verifica_salvarea)
 window.mainloop()
\ No newline at end of file
@@ -1,73 +1,215 @@
+import argparse
 import re
 import fitz
 import os
+import sys
+import hashlib
+import sqlite3
+from multiprocessing import Pool
 
-def extract_text_from_pdf(pdf_path):
+# Modulul comun de instrumentare se află în directorul părinte (SCRIPTS & PROMPTS)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import add_arguments, count, instrumented_run, timer
+
+# Cache-ul textului extras: cheia este (hash-ul fișierului, numărul paginii)
+CACHE_PATH = "text_cache.sqlite"
+PAGES_PER_TASK = 16
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Calculează hash-ul SHA-256 al fișierului, citit pe bucăți."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def open_cache(cache_path=CACHE_PATH):
+    """Deschide (sau creează) baza de date cu textul paginilor deja extrase."""
+    connection = sqlite3.connect(cache_path)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS documents (file_hash TEXT PRIMARY KEY, page_count INTEGER NOT NULL)")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS pages ("
+        "file_hash TEXT NOT NULL, page INTEGER NOT NULL, text TEXT NOT NULL, "
+        "PRIMARY KEY (file_hash, page))")
+    return connection
+
+
+def _extract_page_range(task):
+    """Extrage textul unui interval de pagini (rulează într-un proces separat)."""
+    pdf_path, pages = task
+    with fitz.open(pdf_path) as doc:
+        return [(number, doc[number].get_text()) for number in pages]
+
+
+def iter_pages(pdf_path, processes=None, cache_path=CACHE_PATH):
+    """
+    Generează (număr pagină, text) pentru fiecare pagină, în ordine.
+
+    Paginile deja extrase sunt citite din cache fără a deschide PDF-ul;
+    celelalte sunt împărțite pe intervale și extrase în paralel.
+    """
+    with timer('hash_pdf'):
+        key = file_hash(pdf_path)
+    connection = open_cache(cache_path)
+    pool = None
+    try:
+        row = connection.execute("SELECT page_count FROM documents WHERE file_hash = ?", (key,)).fetchone()
+        if row is None:
+            with fitz.open(pdf_path) as doc:
+                page_count = doc.page_count
+            connection.execute("INSERT INTO documents (file_hash, page_count) VALUES (?, ?)", (key, page_count))
+            connection.commit()
+        else:
+            page_count = row[0]
+
+        cached_pages = {page for (page,) in connection.execute(
+            "SELECT page FROM pages WHERE file_hash = ?", (key,))}
+        missing = [number for number in range(page_count) if number not in cached_pages]
+
+        # Paginile lipsă sunt trimise proceselor câte PAGES_PER_TASK, în ordine
+        extracted = iter(())
+        if missing:
+            count('bytes_read', os.path.getsize(pdf_path))
+            pool = Pool(processes)
+            tasks = [(pdf_path, missing[i:i + PAGES_PER_TASK]) for i in range(0, len(missing), PAGES_PER_TASK)]
+            extracted = pool.imap(_extract_page_range, tasks)
+
+        pending = {}
+        for number in range(page_count):
+            if number in cached_pages:
+                with timer('cache_read'):
+                    (text,) = connection.execute(
+                        "SELECT text FROM pages WHERE file_hash = ? AND page = ?", (key, number)).fetchone()
+                count('cache_hits')
+                yield number, text
+                continue
+            while number not in pending:
+                with timer('pdf_parse'):
+                    page_range = next(extracted)
+                count('pages_parsed', len(page_range))
+                connection.executemany(
+                    "INSERT OR REPLACE INTO pages (file_hash, page, text) VALUES (?, ?, ?)",
+                    [(key, page, text) for page, text in page_range])
+                connection.commit()
+                pending.update(page_range)
+            yield number, pending.pop(number)
+    finally:
+        if pool is not None:
+            pool.terminate()
+        connection.close()
+
+
+def extract_text_from_pdf(pdf_path, processes=None, cache_path=CACHE_PATH):
     """Extrage textul complet din documentul PDF."""
-    text = ""
     try:
-        doc = fitz.open(pdf_path)
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        return text
+        return "".join(text for _, text in iter_pages(pdf_path, processes, cache_path))
     except Exception as e:
         print(f"Eroare la citirea PDF-ului: {e}")
         return ""
 
 
-def find_entries_with_keywords(text, keywords):
+# Pattern pentru identificarea intrărilor principale (cuvinte cu majuscule + numere opționale)
+ENTRY_PATTERN = re.compile(r'([A-ZĂÂÎȘȚ][A-ZĂÂÎȘȚ\-]+\d*)')
+
+# Literele cu diacritice sunt aduse la forma de bază, caracter cu caracter,
+# astfel încât pozițiile din textul normalizat sunt aceleași ca în original
+DIACRITICS_FOLD = str.maketrans('ăâîșşțţĂÂÎȘŞȚŢ', 'aaissttAAISSTT')
+
+
+def normalize_text(text):
+    """Elimină diacriticele (inclusiv variantele cu sedilă) și trece textul la litere mici."""
+    return text.translate(DIACRITICS_FOLD).lower()
+
+
+def compile_keywords(keywords):
     """
-    Identifică intrările principale care conțin cuvintele cheie specificate
-    și extrage paragrafele relevante.
+    Compilează toate cuvintele cheie într-o singură expresie regulată (alternanță),
+    cu cele mai lungi primele. Întoarce expresia și maparea formă normalizată -> cuvânt cheie.
     """
-    # Pattern pentru identificarea intrărilor principale (cuvinte cu majuscule + numere opționale)
-    entry_pattern = re.compile(r'([A-ZĂÂÎȘȚ][A-ZĂÂÎȘȚ\-]+\d*)')
+    folded = {}
+    for keyword in keywords:
+        folded.setdefault(normalize_text(keyword), keyword)
+    alternatives = sorted(folded, key=len, reverse=True)
+    return re.compile('|'.join(map(re.escape, alternatives))), folded
+
+
+def iter_lines(pages):
+    """Împarte în linii un flux de pagini, fără a concatena tot textul."""
+    partial = ''
+    for page_text in pages:
+        lines = (partial + page_text).split('\n')
+        partial = lines.pop()
+        yield from lines
+    yield partial
 
-    # Împărțim textul în linii pentru procesare
-    lines = text.split('\n')
 
-    entries = {}
+def iter_entries_with_keywords(lines, keywords):
+    """
+    Parcurge liniile o singură dată și generează, imediat ce o intrare se încheie,
+    (intrare, paragrafe cu cuvinte cheie, potriviri) pentru intrările relevante.
+
+    Potrivirile sunt tupluri (indexul paragrafului, cuvântul cheie, poziția în paragraf).
+    """
+    keyword_pattern, keyword_by_form = compile_keywords(keywords)
+
     current_entry = None
-    current_content = []
+    paragraphs = []
+    hits = []
+    paragraph_lines = []
+
+    def close_paragraph():
+        # Un paragraf se încheie la o linie goală sau la sfârșitul intrării
+        if not paragraph_lines:
+            return
+        paragraph = '\n'.join(paragraph_lines)
+        paragraph_lines.clear()
+        matches = [
+            (len(paragraphs), keyword_by_form[m.group(0)], m.start())
+            for m in keyword_pattern.finditer(normalize_text(paragraph))
+        ]
+        if matches:
+            hits.extend(matches)
+            paragraphs.append(paragraph)
 
-    # Procesăm fiecare linie pentru a identifica intrările și conținutul lor
     for line in lines:
+        line = line.strip()
         # Verificăm dacă linia conține o intrare principală
-        entry_match = entry_pattern.match(line.strip())
+        entry_match = ENTRY_PATTERN.match(line)
 
-        if entry_match and (line.strip().isupper() or re.match(r'^[A-ZĂÂÎȘȚ][A-ZĂÂÎȘȚ\-]+\d+', line.strip())):
-            # Dacă avem o intrare anterioară și conținut, o salvăm
-            if current_entry and current_content:
-                entries[current_entry] = '\n'.join(current_content)
+        if entry_match and (line.isupper() or entry_match.group(1)[-1].isdigit()):
+            if current_entry is not None:
+                close_paragraph()
+                if paragraphs:
+                    yield current_entry, paragraphs, hits
 
             # Setăm noua intrare curentă
             current_entry = entry_match.group(1)
-            current_content = [line.strip()]
-        elif current_entry:
-            # Adăugăm linia la conținutul intrării curente
-            current_content.append(line.strip())
-
-    # Adăugăm ultima intrare dacă există
-    if current_entry and current_content:
-        entries[current_entry] = '\n'.join(current_content)
+            paragraphs, hits = [], []
+            paragraph_lines.append(line)
+        elif current_entry is not None:
+            if line:
+                paragraph_lines.append(line)
+            else:
+                close_paragraph()
 
-    # Filtrăm intrările care conțin cuvintele cheie și extragem paragrafele relevante
-    results = {}
-    for entry, content in entries.items():
-        paragraphs_with_keywords = []
+    # Ultima intrare, dacă există
+    if current_entry is not None:
+        close_paragraph()
+        if paragraphs:
+            yield current_entry, paragraphs, hits
 
-        # Împărțim conținutul în paragrafe
-        paragraphs = re.split(r'\n\s*\n', content)
-
-        for paragraph in paragraphs:
-            # Verificăm dacă paragraful conține vreunul din cuvintele cheie
-            if any(keyword.lower() in paragraph.lower() for keyword in keywords):
-                paragraphs_with_keywords.append(paragraph)
-
-        if paragraphs_with_keywords:
-            results[entry] = paragraphs_with_keywords
 
+def find_entries_with_keywords(text, keywords):
+    """
+    Identifică intrările principale care conțin cuvintele cheie specificate
+    și extrage paragrafele relevante.
+    """
+    results = {}
+    for entry, paragraphs, _ in iter_entries_with_keywords(text.split('\n'), keywords):
+        results[entry] = paragraphs
     return results
 
 
@@ -85,8 +227,16 @@ def save_results_to_file(results, output_file):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Caută în PDF intrările care conțin cuvintele cheie.")
     # Calea către fișierul PDF (prestabilită la același nivel cu scriptul)
-    pdf_path = "Toponimia de pe valea Sucevei.pdf"
+    parser.add_argument('pdf_path', nargs='?', default="Toponimia de pe valea Sucevei.pdf")
+    add_arguments(parser)
+    args = parser.parse_args()
+    with instrumented_run('text_extractor', args):
+        run(args.pdf_path)
+
+
+def run(pdf_path):
 
     print(f"Se folosește fișierul: {pdf_path}")
 
@@ -98,24 +248,29 @@ def main():
     # Cuvintele cheie de căutat
     keywords = ["pădur", "codr", "fiton", "dendron"]
 
-    # Extragem textul din PDF
-    print("Se extrage textul din PDF...")
-    text = extract_text_from_pdf(pdf_path)
-
-    if not text:
-        print("Nu s-a putut extrage text din PDF.")
+    # Extragem textul din PDF pagină cu pagină și căutăm intrările pe măsură ce se încheie
+    print("Se extrage textul din PDF și se caută intrările cu cuvintele cheie...")
+    results = {}
+    try:
+        # Extragerea și căutarea sunt intercalate: din timpul acestei etape, ce nu este
+        # pdf_parse / cache_read / hash_pdf este timpul căutării
+        with timer('extract_and_match'):
+            lines = iter_lines(text for _, text in iter_pages(pdf_path))
+            for entry, paragraphs, hits in iter_entries_with_keywords(lines, keywords):
+                results[entry] = paragraphs
+                count('keyword_hits', len(hits))
+    except Exception as e:
+        print(f"Eroare la citirea PDF-ului: {e}")
         return
-
-    # Găsim intrările cu cuvintele cheie și paragrafele relevante
-    print("Se caută intrările cu cuvintele cheie...")
-    results = find_entries_with_keywords(text, keywords)
+    count('entries_found', len(results))
 
     # Afișăm numărul de intrări găsite
     print(f"S-au găsit {len(results)} intrări care conțin cuvintele cheie.")
 
     # Salvăm rezultatele într-un fișier
     output_file = "rezultate_padure_codru.txt"
-    save_results_to_file(results, output_file)
+    with timer('save_results'):
+        save_results_to_file(results, output_file)
 
     print(f"Rezultatele au fost salvate în fișierul {output_file}")
 
@@ -1,114 +1,241 @@
+import argparse
 import csv
+import glob
+import os
+import sys
+from multiprocessing import Pool
 from docx import Document
 import re
 
+# Modulul comun de instrumentare se află în directorul părinte (SCRIPTS & PROMPTS)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import add_arguments, count, instrumented_run, timer
 
-def transfer_word_to_csv(input_file, output_file):
-    """
-    Transferă date din fișierul Word în format CSV, păstrând header-ul exact cum este
-    și adăugând datele în coloanele corespunzătoare
 
-    Args:
-        input_file (str): Calea către fișierul .docx
-        output_file (str): Calea către fișierul .csv de ieșire
+# Zecimalele păstrate la compararea coordonatelor (~1 m)
+COORDINATE_DECIMALS = 5
+INDEX_SUFFIX = ".index"
+# Liniile indexului care încep cu acest prefix rețin dimensiunea și data CSV-ului indexat
+STAMP_PREFIX = "#csv "
+
+
+def parse_word_file(input_file):
     """
-    try:
-        # Citește documentul Word
-        doc = Document(input_file)
+    Citește un fișier Word și întoarce rândurile valide [nume_padure, locatie, latitudine, longitudine]
+    împreună cu avertismentele pentru liniile care nu au putut fi procesate.
+    """
+    doc = Document(input_file)
+    rows = []
+    warnings = []
 
-        # Lista pentru a stoca datele procesate
-        new_data_rows = []
+    # Procesează fiecare paragraf din document
+    for paragraph in doc.paragraphs:
+        text = paragraph.text.strip()
 
-        # Citește fișierul CSV existent
-        existing_rows = []
-        try:
-            with open(output_file, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                existing_rows = list(reader)
-        except FileNotFoundError:
-            print(f"Avertisment: Fișierul {output_file} nu a fost găsit!")
-            return
+        # Sare peste paragrafele goale
+        if not text:
+            continue
 
-        # Găsește următorul index disponibil
-        next_index = 1
-        if len(existing_rows) > 1:  # Dacă are header + date
-            for row in existing_rows[1:]:  # Skip header-ul
-                if row and len(row) > 0:
-                    try:
-                        current_index = int(row[0])
-                        next_index = max(next_index, current_index + 1)
-                    except (ValueError, IndexError):
-                        continue
-
-        # Procesează fiecare paragraf din document
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-
-            # Sare peste paragrafele goale
-            if not text:
-                continue
+        # Împarte textul după virgule
+        parts = [part.strip() for part in text.split(',')]
 
-            # Împarte textul după virgule
-            parts = [part.strip() for part in text.split(',')]
+        # Verifică dacă are exact 4 părți (nume, locație, lat, lng)
+        if len(parts) == 4:
+            nume_padure = parts[0]
+            locatie = parts[1]
 
-            # Verifică dacă are exact 4 părți (nume, locație, lat, lng)
-            if len(parts) == 4:
-                nume_padure = parts[0]
-                locatie = parts[1]
+            try:
+                # Convertește coordonatele la float pentru validare
+                latitudine = float(parts[2])
+                longitudine = float(parts[3])
+
+                # Creează rândul nou FĂRĂ index: [nume_padure, locatie, latitudine, longitudine]
+                rows.append([nume_padure, locatie, latitudine, longitudine])
+
+            except ValueError:
+                warnings.append(f"Avertisment: Coordonate invalide pentru linia: {text}")
+        else:
+            warnings.append(f"Avertisment: Format incorect pentru linia: {text}")
+
+    return rows, warnings
+
+
+def _parse_word_file_safe(input_file):
+    """Variantă pentru procesele paralele: erorile sunt întoarse, nu aruncate."""
+    try:
+        rows, warnings = parse_word_file(input_file)
+        return input_file, rows, warnings, None
+    except Exception as e:
+        return input_file, [], [], e
+
+
+def row_key(nume_padure, latitudine, longitudine):
+    """Cheia de deduplicare: numele normalizat și coordonatele rotunjite."""
+    return "\t".join((
+        re.sub(r"\s+", " ", str(nume_padure)).strip().casefold(),
+        f"{float(latitudine):.{COORDINATE_DECIMALS}f}",
+        f"{float(longitudine):.{COORDINATE_DECIMALS}f}",
+    ))
+
+
+def csv_stamp(output_file):
+    """Amprenta CSV-ului (dimensiune și data modificării), scrisă în index după fiecare adăugare."""
+    stat = os.stat(output_file)
+    return f"{STAMP_PREFIX}{stat.st_size} {stat.st_mtime_ns}"
 
-                try:
-                    # Convertește coordonatele la float pentru validare
-                    latitudine = float(parts[2])
-                    longitudine = float(parts[3])
 
-                    # Creează rândul nou FĂRĂ index: [nume_padure, locatie, latitudine, longitudine]
-                    new_row = [nume_padure, locatie, latitudine, longitudine]
-                    new_data_rows.append(new_row)
+def load_row_index(output_file):
+    """
+    Încarcă indexul cheilor deja existente din fișierul alăturat (<csv>.index).
 
+    Indexul este folosit doar dacă ultima lui amprentă corespunde CSV-ului. Dacă
+    indexul lipsește, sau CSV-ul a fost modificat în afara scriptului (trunchiat,
+    editat, restaurat) ori o rulare s-a întrerupt între CSV și index, indexul
+    este reconstruit din CSV.
+    """
+    index_file = output_file + INDEX_SUFFIX
+    if os.path.exists(index_file):
+        with open(index_file, 'r', encoding='utf-8') as f:
+            lines = [line.rstrip('\n') for line in f if line.strip()]
+        stamps = [line for line in lines if line.startswith(STAMP_PREFIX)]
+        if stamps and stamps[-1] == csv_stamp(output_file):
+            return {line for line in lines if not line.startswith(STAMP_PREFIX)}
+        print(f"Indexul {index_file} nu mai corespunde fișierului CSV și este reconstruit.")
+
+    keys = set()
+    with open(output_file, 'r', encoding='utf-8-sig', newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)  # header-ul
+        for row in reader:
+            if len(row) >= 4:
+                try:
+                    keys.add(row_key(row[0], row[2], row[3]))
                 except ValueError:
-                    print(f"Avertisment: Coordonate invalide pentru linia: {text}")
                     continue
-            else:
-                print(f"Avertisment: Format incorect pentru linia: {text}")
+    with open(index_file, 'w', encoding='utf-8') as f:
+        f.writelines(key + "\n" for key in sorted(keys))
+        f.write(csv_stamp(output_file) + "\n")
+    return keys
+
+
+def ends_with_newline(path):
+    """Verifică dacă fișierul se termină cu un sfârșit de linie (sau este gol)."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
 
-        # Rescrie fișierul CSV
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
+def resolve_input_files(input_file):
+    """Acceptă un fișier .docx, un director sau un tipar glob (ex. './regiuni/*.docx')."""
+    if os.path.isdir(input_file):
+        return sorted(glob.glob(os.path.join(input_file, "*.docx")))
+    if glob.has_magic(input_file):
+        return sorted(glob.glob(input_file))
+    return [input_file]
 
-            # Scrie header-ul EXACT cum era (fără modificări)
-            if existing_rows:
-                writer.writerow(existing_rows[0])
 
-            # Scrie datele existente (dacă sunt)
-            if len(existing_rows) > 1:
-                for row in existing_rows[1:]:
-                    if row:
-                        writer.writerow(row)
+def transfer_word_to_csv(input_file, output_file, processes=None):
+    """
+    Transferă date din fișierele Word în format CSV, păstrând header-ul exact cum este
+    și adăugând datele în coloanele corespunzătoare.
 
-            # Adaugă datele noi
-            writer.writerows(new_data_rows)
+    Fișierul CSV nu este rescris: rândurile noi sunt doar adăugate la final, iar
+    duplicatele (același nume și aceleași coordonate) sunt respinse folosind
+    indexul alăturat <csv>.index.
+
+    Args:
+        input_file (str): Calea către fișierul .docx, un director sau un tipar glob
+        output_file (str): Calea către fișierul .csv de ieșire
+        processes (int): Numărul de procese pentru citirea fișierelor Word
+    """
+    try:
+        if not os.path.exists(output_file):
+            print(f"Avertisment: Fișierul {output_file} nu a fost găsit!")
+            return
+
+        input_files = resolve_input_files(input_file)
+        if not input_files:
+            print(f"❌ Eroare: Nu s-a găsit niciun fișier .docx pentru {input_file}!")
+            return
+
+        with timer('load_index'):
+            existing_keys = load_row_index(output_file)
+
+        # Citește fișierele Word în paralel
+        with timer('parse_word'):
+            with Pool(min(processes or os.cpu_count(), len(input_files))) as pool:
+                parsed = pool.map(_parse_word_file_safe, input_files)
+        count('files_in', len(input_files))
+        count('bytes_read', sum(os.path.getsize(f) for f in input_files if os.path.exists(f)))
+
+        new_data_rows = []
+        new_keys = []
+        duplicate_count = 0
+        for source_file, rows, warnings, error in parsed:
+            if error is not None:
+                if isinstance(error, FileNotFoundError) or not os.path.exists(source_file):
+                    print(f"❌ Eroare: Fișierul {source_file} nu a fost găsit!")
+                else:
+                    print(f"❌ Eroare la citirea fișierului {source_file}: {error}")
+                continue
+            for warning in warnings:
+                print(warning)
+            count('rows_in', len(rows))
+            count('warnings', len(warnings))
+            for row in rows:
+                key = row_key(row[0], row[2], row[3])
+                if key in existing_keys:
+                    duplicate_count += 1
+                    continue
+                existing_keys.add(key)
+                new_keys.append(key)
+                new_data_rows.append(row)
+
+        # Adaugă doar datele noi la finalul fișierului CSV
+        count('rows_out', len(new_data_rows))
+        count('duplicates', duplicate_count)
+        if new_data_rows:
+            with timer('append_csv'):
+                needs_newline = not ends_with_newline(output_file)
+                with open(output_file, 'a', newline='', encoding='utf-8') as csvfile:
+                    if needs_newline:
+                        csvfile.write('\r\n')
+                    writer = csv.writer(csvfile)
+                    writer.writerows(new_data_rows)
+                    csvfile.flush()
+                    os.fsync(csvfile.fileno())
+                # Indexul este actualizat după CSV; amprenta scrisă la final îl validează,
+                # deci o întrerupere între cele două scrieri duce la reconstruirea lui
+                with open(output_file + INDEX_SUFFIX, 'a', encoding='utf-8') as f:
+                    f.writelines(key + "\n" for key in new_keys)
+                    f.write(csv_stamp(output_file) + "\n")
 
         print(f"✅ Transfer completat cu succes!")
-        print(f"📄 Fișier sursă: {input_file}")
+        print(f"📄 Fișiere sursă: {', '.join(input_files)}")
         print(f"📊 Fișier destinație: {output_file}")
         print(f"📈 Numărul de înregistrări noi adăugate: {len(new_data_rows)}")
+        print(f"🔁 Numărul de duplicate ignorate: {duplicate_count}")
         print(f"📊 Datele au fost adăugate direct în coloanele corespunzătoare (fără index automat)")
 
-    except FileNotFoundError:
-        print(f"❌ Eroare: Fișierul {input_file} nu a fost găsit!")
     except Exception as e:
         print(f"❌ Eroare neașteptată: {str(e)}")
 
 
 def main():
     """Funcția principală cu path-urile specifice"""
-    input_file = "./paduri_oltenia.docx"
-    output_file = "./paduri_oltenia.csv"
+    parser = argparse.ArgumentParser(description="Transferă pădurile din fișierele Word în CSV.")
+    parser.add_argument('--input', default="./paduri_oltenia.docx")
+    parser.add_argument('--output', default="./paduri_oltenia.csv")
+    add_arguments(parser)
+    args = parser.parse_args()
 
     print("🌲 Începe transferul datelor despre pădurile din Oltenia...")
-    transfer_word_to_csv(input_file, output_file)
+    with instrumented_run('transfer_word_to_csv', args):
+        transfer_word_to_csv(args.input, args.output)
 
 
 if __name__ == "__main__":
     main()
-
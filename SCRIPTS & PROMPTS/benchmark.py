@@ -0,0 +1,296 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows: no worker memory figures
+    resource = None
+
+import matplotlib
+matplotlib.use('Agg')  # the poster plot is saved, never shown
+import numpy as np
+import pandas as pd
+
+from synthetic_data import generate_dataset
+
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PDF_KEYWORDS = ["pădur", "codr", "fiton", "dendron"]
+FOREST_CSV_HEADER = "Forest Name ,Address,Longitude,Latitude\r\n"
+# A case is reported as a regression when it is this much slower than the baseline
+REGRESSION_RATIO = 1.25
+# ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+MAXRSS_BYTES = 1 if sys.platform == 'darwin' else 1024
+
+
+def load_script(relative_path: str, module_name: str):
+    """
+    Imports a script by path (for the folders with a main.py and the poster script).
+    The module is registered in sys.modules, so that process pool workers can
+    unpickle its functions.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    path = os.path.join(SCRIPTS_DIR, relative_path)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    sys.path.insert(0, os.path.dirname(path))
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(os.path.dirname(path))
+    return module
+
+
+# --- Cases: each returns (setup, run); only run is measured ---
+
+def case_transfer_word_to_csv(paths: dict, work_dir: str):
+    module = load_script('Transfer_Word_to_CSV/main.py', 'transfer_word_to_csv_main')
+    output_file = os.path.join(work_dir, 'forests.csv')
+
+    def setup():
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            f.write(FOREST_CSV_HEADER)
+        if os.path.exists(output_file + module.INDEX_SUFFIX):
+            os.remove(output_file + module.INDEX_SUFFIX)
+
+    return setup, lambda: module.transfer_word_to_csv(paths['docx'], output_file)
+
+
+def case_extract_text_from_pdf(paths: dict, work_dir: str):
+    module = load_script('Text_extractor_from_pdf/main.py', 'text_extractor_main')
+    cache_path = os.path.join(work_dir, 'text_cache.sqlite')
+
+    def setup():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    return setup, lambda: module.extract_text_from_pdf(paths['pdf'], cache_path=cache_path)
+
+
+def case_extract_text_from_pdf_cached(paths: dict, work_dir: str):
+    module = load_script('Text_extractor_from_pdf/main.py', 'text_extractor_main')
+    cache_path = os.path.join(work_dir, 'text_cache_warm.sqlite')
+    module.extract_text_from_pdf(paths['pdf'], cache_path=cache_path)
+    return (lambda: None), lambda: module.extract_text_from_pdf(paths['pdf'], cache_path=cache_path)
+
+
+def case_find_entries_with_keywords(paths: dict, work_dir: str):
+    module = load_script('Text_extractor_from_pdf/main.py', 'text_extractor_main')
+    text = module.extract_text_from_pdf(paths['pdf'], cache_path=os.path.join(work_dir, 'text_cache_find.sqlite'))
+    return (lambda: None), lambda: module.find_entries_with_keywords(text, PDF_KEYWORDS)
+
+
+def case_is_a_locality_rowwise(paths: dict, work_dir: str):
+    from filter_localities import is_a_locality
+    df = pd.read_csv(paths['occurrences'], encoding='utf-8')
+    return (lambda: None), lambda: df[df['cuvant'].apply(is_a_locality)]
+
+
+def case_locality_mask(paths: dict, work_dir: str):
+    from filter_localities import get_default_classifier
+    df = pd.read_csv(paths['occurrences'], encoding='utf-8')
+    classifier = get_default_classifier()
+    return (lambda: None), lambda: df[classifier.mask(df['cuvant'])]
+
+
+def case_plot_word_stats_colored_labels(paths: dict, work_dir: str):
+    module = load_script('filtrare localitati_vizualizare poster.py', 'poster_plot')
+    output_file = os.path.join(work_dir, 'poster.png')
+    return (lambda: None), lambda: module.plot_word_stats_colored_labels(paths['occurrences'], 1, output_file)
+
+
+def case_extract_occurrences(paths: dict, work_dir: str):
+    from extract_occurrences import extract_occurrences, load_gazetteer
+    toponyms = load_gazetteer(paths['gazetteer'])
+    return (lambda: None), lambda: extract_occurrences(paths['corpus'], toponyms)
+
+
+def case_buffer_table(paths: dict, work_dir: str):
+    from buffer_analysis import buffer_table
+    from spatial_index import read_layer
+    points = read_layer(paths['points'])
+    cities = points.iloc[::20]
+    return (lambda: None), lambda: buffer_table(cities, {'Points': points}, [5, 10, 25, 50])
+
+
+# Case name -> (generated file kinds it needs, case builder)
+CASES = {
+    'transfer_word_to_csv': (['docx'], case_transfer_word_to_csv),
+    'extract_text_from_pdf': (['pdf'], case_extract_text_from_pdf),
+    'extract_text_from_pdf_cached': (['pdf'], case_extract_text_from_pdf_cached),
+    'find_entries_with_keywords': (['pdf'], case_find_entries_with_keywords),
+    'is_a_locality_rowwise': (['occurrences'], case_is_a_locality_rowwise),
+    'locality_mask': (['occurrences'], case_locality_mask),
+    'plot_word_stats_colored_labels': (['occurrences'], case_plot_word_stats_colored_labels),
+    'extract_occurrences': (['corpus'], case_extract_occurrences),
+    'buffer_table': (['points'], case_buffer_table),
+}
+
+
+def memory_pass(setup, run) -> tuple:
+    """
+    Runs setup() and run() once under tracemalloc.
+
+    Returns:
+        tuple: (peak Python memory in MB, peak resident set of the worker processes
+        in MB or None). The OS keeps the workers' peak as a maximum over every worker
+        the process ever waited for, so it only means something in a fresh process.
+    """
+    setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * MAXRSS_BYTES / 1e6 if resource else None
+    return peak / 1e6, workers
+
+
+def _memory_pass_child(setup, run, conn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn.send(memory_pass(setup, run))
+    conn.close()
+
+
+def measure(setup, run, repeat: int = 3) -> dict:
+    """
+    Times run() repeat times (after setup() each time), then runs it once more
+    for the memory figures: the peak Python memory (tracemalloc) and, for the
+    Pool-based cases, the peak resident set of the worker processes, which
+    tracemalloc cannot see. Where the OS can fork, the memory pass runs in a
+    forked process, so the workers' peak is this case's alone.
+    The scripts' console output is discarded.
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            setup()
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        if resource and 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_memory_pass_child, args=(setup, run, sender))
+            process.start()
+            sender.close()
+            peak, workers = receiver.recv()
+            process.join()
+        else:
+            peak, workers = memory_pass(setup, run)
+    return {
+        'times_s': times,
+        'min_s': min(times),
+        'median_s': statistics.median(times),
+        'peak_python_mb': peak,
+        'peak_workers_rss_mb': workers or None,
+    }
+
+
+def run_benchmarks(scales, cases, repeat: int = 3, seed: int = 0, data_dir: str = None) -> dict:
+    """
+    Generates a synthetic dataset per scale and measures every case on it.
+
+    Returns:
+        dict: Machine-readable results (environment, and one record per case and scale).
+    """
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+        'seed': seed,
+        'repeat': repeat,
+        'results': [],
+    }
+    for scale in scales:
+        work_dir = tempfile.mkdtemp(prefix=f'benchmark_x{scale:g}_', dir=data_dir)
+        try:
+            kinds = sorted({kind for name in cases for kind in CASES[name][0]})
+            start = time.perf_counter()
+            paths = generate_dataset(os.path.join(work_dir, 'data'), scale, seed, kinds)
+            print(f"Scale {scale:g}: dataset generated in {time.perf_counter() - start:.1f} s")
+            for name in cases:
+                setup, run = CASES[name][1](paths, work_dir)
+                record = {'case': name, 'scale': scale, **measure(setup, run, repeat)}
+                results['results'].append(record)
+                workers = record['peak_workers_rss_mb']
+                print(f"  {name}: {record['median_s']:.3f} s (median), peak {record['peak_python_mb']:.1f} MB"
+                      + (f", workers {workers:.1f} MB RSS" if workers else ""))
+        finally:
+            if data_dir is None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """
+    Compares median times with a previous results file.
+
+    Returns:
+        list: (case, scale, baseline median, median, ratio) for the regressions.
+    """
+    previous = {(r['case'], r['scale']): r['median_s'] for r in baseline['results']}
+    regressions = []
+    for record in results['results']:
+        before = previous.get((record['case'], record['scale']))
+        if before and record['median_s'] / before >= REGRESSION_RATIO:
+            regressions.append((record['case'], record['scale'], before, record['median_s'], record['median_s'] / before))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the processing stages on synthetic data.")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1], help="1 = today's data size, up to 100")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', help="Keep the generated data in this directory")
+    parser.add_argument('--baseline', help="Previous results file to compare with")
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    try:
+        print("-" * 30)
+        results = run_benchmarks(args.scales, args.cases, args.repeat, args.seed, args.data_dir)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print("-" * 30)
+        print(f"Benchmark complete! Results have been saved to '{args.output}'")
+
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                regressions = compare(results, json.load(f))
+            if regressions:
+                print(f"Regressions (>= {REGRESSION_RATIO:g}x slower than '{args.baseline}'):")
+                for case, scale, before, after, ratio in regressions:
+                    print(f"  {case} x{scale:g}: {before:.3f} s -> {after:.3f} s ({ratio:.2f}x)")
+            else:
+                print(f"No regressions compared with '{args.baseline}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
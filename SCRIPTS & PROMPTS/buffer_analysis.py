@@ -0,0 +1,75 @@
+import argparse
+
+import pandas as pd
+
+from spatial_index import SpatialIndex, read_layer
+
+
+CITIES_FILE = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA/1_LISTA DARIAH GEOBROWSER PROJECT_romane haiducesti Romania.csv"
+DEFAULT_LAYERS = {
+    'Forests': "Transfer_Word_to_CSV/paduri_oltenia.csv",
+}
+# Same radii as the "Buffer 10 / 20 / 30" columns of the QGIS workbook
+DEFAULT_RADII_KM = [10, 20, 30]
+
+
+def buffer_table(cities: pd.DataFrame, layers: dict, radii_km) -> pd.DataFrame:
+    """
+    Counts, for every city, the points of each layer within each radius.
+    Each layer is indexed once and all cities and radii are queried in batch.
+
+    Args:
+        cities (pd.DataFrame): Layer with Name / Longitude / Latitude columns.
+        layers (dict): Layer name -> DataFrame with Longitude / Latitude columns.
+        radii_km (list): Buffer radii in kilometres.
+
+    Returns:
+        pd.DataFrame: One row per city, one '<layer> Buffer <radius>' column per layer and radius.
+    """
+    table = cities[['Name', 'Longitude', 'Latitude']].rename(columns={'Name': 'City'}).reset_index(drop=True)
+    for layer_name, layer_df in layers.items():
+        index = SpatialIndex.from_layer(layer_df)
+        counts = index.count_within(table['Longitude'].to_numpy(), table['Latitude'].to_numpy(), radii_km)
+        for column, radius in enumerate(radii_km):
+            table[f"{layer_name} Buffer {radius:g}"] = counts[:, column]
+    return table
+
+
+def parse_layer_argument(value: str):
+    """'Name=path.csv' -> ('Name', 'path.csv')"""
+    name, sep, path = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Layer must be given as NAME=PATH, got '{value}'")
+    return name.strip(), path.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count layer points within buffers around the hajduk-novel cities.")
+    parser.add_argument('--cities', default=CITIES_FILE)
+    parser.add_argument('--layer', action='append', type=parse_layer_argument,
+                        help="Layer to count, as NAME=PATH (CSV or XLSX). Can be repeated.")
+    parser.add_argument('--radii', type=float, nargs='+', default=DEFAULT_RADII_KM, help="Radii in km")
+    parser.add_argument('--output', default='buffer_values.csv')
+    args = parser.parse_args()
+
+    layer_files = dict(args.layer) if args.layer else DEFAULT_LAYERS
+
+    try:
+        cities = read_layer(args.cities)
+        layers = {name: read_layer(path) for name, path in layer_files.items()}
+        table = buffer_table(cities, layers, args.radii)
+        table.to_csv(args.output, index=False, encoding='utf-8-sig')
+
+        print("-" * 30)
+        print(f"Buffer analysis complete!")
+        print(f"Cities: {len(cities)}, layers: {', '.join(f'{n} ({len(df)})' for n, df in layers.items())}")
+        print(f"Buffer table has been saved to '{args.output}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import os
+import re
+import zipfile
+from multiprocessing import Pool
+
+import numpy as np
+
+from extract_occurrences import (CONTEXT_SEPARATOR, CONTEXT_WINDOW, CORPUS_ZIP, TOKEN_PATTERN, collation_key,
+                                 iter_corpus_members, load_lemmas, match_keys)
+
+
+INDEX_DIR = "concordance_index"
+# A chapter opens on a line of its own with a Roman numeral ('III.') or with 'CAPITOLUL'/'Capitolul'.
+# Lone 'C.', 'L.' are initials in this corpus, so a numeral must contain I, V or X.
+CHAPTER_HEADING = re.compile(r"^[ \t]*(?:CAPITOLUL\b|Capitolul\b|(?=[IVXLC]*[IVX])[IVXLC]+\.[ \t]*\r?$)", re.M)
+
+
+def _tokenize_member(task):
+    zip_path, member_name = task
+    with zipfile.ZipFile(zip_path) as archive:
+        text = archive.read(member_name).decode('utf-8', errors='replace')
+    matches = list(TOKEN_PATTERN.finditer(text))
+    starts = np.fromiter((m.start() for m in matches), dtype=np.int64, count=len(matches))
+    # Token offset of every chapter heading, found on the raw lines before they are flattened
+    headings = np.searchsorted(starts, [m.start() for m in CHAPTER_HEADING.finditer(text)])
+    return os.path.basename(member_name), [m.group() for m in matches], headings
+
+
+def build_index(zip_path: str, index_dir: str = INDEX_DIR, lemmas: dict = None, processes: int = None):
+    """
+    Tokenizes every novel of the corpus zip (in parallel) and writes a positional
+    inverted index to index_dir:
+
+        tokens.npy        term id of every token, all novels concatenated
+        surface.npy       surface-form id of every token (for displaying contexts)
+        doc_offsets.npy   first token position of every novel (+ the total)
+        postings.npy      token positions grouped by term (CSR layout)
+        term_offsets.npy  start of every term's positions in postings.npy (+ the total)
+        chapters.npy      token position of every chapter heading (see CHAPTER_HEADING)
+        terms.txt, surfaces.txt, docs.txt
+        lemmas.txt        the form<TAB>lemma map the keys were built with
+    """
+    lemmas = lemmas or {}
+    members = list(iter_corpus_members(zip_path))
+    term_ids, surface_ids = {}, {}
+    token_chunks, surface_chunks, chapter_chunks, doc_names, doc_lengths = [], [], [], [], []
+
+    with Pool(processes) as pool:
+        for file_name, tokens, headings in pool.imap(_tokenize_member, [(zip_path, m) for m in members]):
+            keys = match_keys(tokens, lemmas)
+            token_chunks.append(np.fromiter((term_ids.setdefault(k, len(term_ids)) for k in keys),
+                                            dtype=np.int32, count=len(keys)))
+            surface_chunks.append(np.fromiter((surface_ids.setdefault(t, len(surface_ids)) for t in tokens),
+                                              dtype=np.int32, count=len(tokens)))
+            chapter_chunks.append(headings + sum(doc_lengths))
+            doc_names.append(file_name)
+            doc_lengths.append(len(tokens))
+
+    tokens = np.concatenate(token_chunks) if token_chunks else np.zeros(0, dtype=np.int32)
+    surface = np.concatenate(surface_chunks) if surface_chunks else np.zeros(0, dtype=np.int32)
+    doc_offsets = np.concatenate(([0], np.cumsum(doc_lengths))).astype(np.int64)
+    chapters = np.concatenate(chapter_chunks).astype(np.int64) if chapter_chunks else np.zeros(0, dtype=np.int64)
+
+    # Stable sort keeps every term's positions in increasing order
+    postings = np.argsort(tokens, kind='stable').astype(np.int64)
+    term_offsets = np.concatenate(([0], np.cumsum(np.bincount(tokens, minlength=len(term_ids))))).astype(np.int64)
+
+    os.makedirs(index_dir, exist_ok=True)
+    for name, array in (('tokens', tokens), ('surface', surface), ('doc_offsets', doc_offsets),
+                        ('postings', postings), ('term_offsets', term_offsets), ('chapters', chapters)):
+        np.save(os.path.join(index_dir, f'{name}.npy'), array)
+    for name, values in (('terms', term_ids), ('surfaces', surface_ids), ('docs', doc_names),
+                         ('lemmas', [f"{form}\t{lemma}" for form, lemma in sorted(lemmas.items())])):
+        with open(os.path.join(index_dir, f'{name}.txt'), 'w', encoding='utf-8') as f:
+            f.writelines(value + '\n' for value in values)
+
+
+class CorpusIndex:
+    """
+    Read-only access to an index written by build_index. The arrays are
+    memory-mapped, so opening the index costs almost nothing and queries only
+    touch the positions of the terms involved.
+
+    Queries are keyed with the lemma map stored in the index. A lemma map given
+    here must be the same one, otherwise ValueError is raised (rebuild the index).
+    """
+
+    def __init__(self, index_dir: str = INDEX_DIR, lemmas: dict = None):
+        def load(name):
+            return np.load(os.path.join(index_dir, f'{name}.npy'), mmap_mode='r')
+
+        def read_lines(name):
+            with open(os.path.join(index_dir, f'{name}.txt'), encoding='utf-8') as f:
+                return [line.rstrip('\n') for line in f]
+
+        self.tokens = load('tokens')
+        self.surface = load('surface')
+        self.doc_offsets = np.asarray(load('doc_offsets'))
+        self.postings = load('postings')
+        self.term_offsets = load('term_offsets')
+        self.term_ids = {term: i for i, term in enumerate(read_lines('terms'))}
+        self.surfaces = read_lines('surfaces')
+        self.docs = read_lines('docs')
+        # None for indexes built before chapter headings were recorded
+        chapters_file = os.path.join(index_dir, 'chapters.npy')
+        self.chapters = np.load(chapters_file) if os.path.exists(chapters_file) else None
+        # Indexes built before the lemma map was stored had none
+        lemmas_file = os.path.join(index_dir, 'lemmas.txt')
+        stored = load_lemmas(lemmas_file) if os.path.exists(lemmas_file) else {}
+        if lemmas is not None and lemmas != stored:
+            raise ValueError(f"The index in '{index_dir}' was built with a different lemma map; "
+                             f"rebuild it with --build and the same --lemmas file")
+        self.lemmas = stored
+
+    # --- Terms and positions ---
+
+    def keys(self, text: str) -> list:
+        """Normalized (and lemmatized) index keys of a query text."""
+        return match_keys(TOKEN_PATTERN.findall(text), self.lemmas)
+
+    def term_positions(self, key: str) -> np.ndarray:
+        term_id = self.term_ids.get(key)
+        if term_id is None:
+            return np.zeros(0, dtype=np.int64)
+        return self.postings[self.term_offsets[term_id]:self.term_offsets[term_id + 1]]
+
+    def doc_of(self, positions) -> np.ndarray:
+        """Index of the novel each global position belongs to."""
+        return np.searchsorted(self.doc_offsets, positions, side='right') - 1
+
+    def phrase_positions(self, phrase: str) -> np.ndarray:
+        """Start positions of a (possibly multi-word) phrase, never crossing two novels."""
+        keys = self.keys(phrase)
+        if not keys:
+            return np.zeros(0, dtype=np.int64)
+        starts = np.asarray(self.term_positions(keys[0]))
+        for offset, key in enumerate(keys[1:], start=1):
+            starts = np.intersect1d(starts, np.asarray(self.term_positions(key)) - offset, assume_unique=True)
+        if len(keys) > 1:
+            starts = starts[self.doc_of(starts) == self.doc_of(starts + len(keys) - 1)]
+        return starts
+
+    def near(self, phrase: str, other: str, distance: int = 10) -> np.ndarray:
+        """
+        Start positions of phrase that have other within distance tokens
+        (before or after) in the same novel.
+        """
+        starts = self.phrase_positions(phrase)
+        others = self.phrase_positions(other)
+        if starts.size == 0 or others.size == 0:
+            return starts[:0]
+        # Nearest occurrence of other on each side, found by binary search
+        right = np.searchsorted(others, starts)
+        before = others[np.clip(right - 1, 0, len(others) - 1)]
+        after = others[np.clip(right, 0, len(others) - 1)]
+        docs = self.doc_of(starts)
+        ok_before = (right > 0) & (starts - before <= distance) & (self.doc_of(before) == docs)
+        ok_after = (right < len(others)) & (after - starts <= distance) & (self.doc_of(after) == docs)
+        return starts[ok_before | ok_after]
+
+    # --- Results ---
+
+    def counts(self, phrase: str) -> dict:
+        """Occurrences of a phrase per novel (only novels where it occurs)."""
+        per_doc = np.bincount(self.doc_of(self.phrase_positions(phrase)), minlength=len(self.docs))
+        return {self.docs[i]: int(per_doc[i]) for i in np.flatnonzero(per_doc)}
+
+    def context(self, start: int, length: int = 1, window: int = CONTEXT_WINDOW) -> str:
+        """Surface text around a match, clipped to the novel it belongs to."""
+        doc = self.doc_of(start)
+        lo = max(self.doc_offsets[doc], start - window)
+        hi = min(self.doc_offsets[doc + 1], start + length + window)
+        return ' '.join(self.surfaces[i] for i in self.surface[lo:hi])
+
+    def kwic(self, phrase: str, window: int = CONTEXT_WINDOW, positions=None) -> list:
+        """
+        Keyword-in-context lines for a phrase (or for the given start positions).
+
+        Returns:
+            list: (novel, position, context) tuples in corpus order.
+        """
+        length = len(self.keys(phrase))
+        positions = self.phrase_positions(phrase) if positions is None else positions
+        docs = self.doc_of(positions)
+        return [(self.docs[d], int(p), self.context(int(p), length, window)) for p, d in zip(positions, docs)]
+
+    def occurrence_rows(self, toponyms, window: int = CONTEXT_WINDOW) -> list:
+        """
+        Regenerates the cuvant, fisier, total_aparitii, contexte rows of the
+        occurrence tables from the index instead of rescanning the corpus.
+        """
+        rows = []
+        for toponym in toponyms:
+            by_doc = {}
+            for doc, _, context in self.kwic(toponym, window):
+                by_doc.setdefault(doc, []).append(context)
+            for doc, contexts in by_doc.items():
+                rows.append([toponym, doc, len(contexts), CONTEXT_SEPARATOR.join(contexts)])
+        rows.sort(key=lambda row: collation_key(row[0]))
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the positional index of the HAI-RO corpus.")
+    parser.add_argument('--corpus', default=CORPUS_ZIP)
+    parser.add_argument('--index', default=INDEX_DIR)
+    parser.add_argument('--lemmas', help="Optional form<TAB>lemma file")
+    parser.add_argument('--build', action='store_true', help="(Re)build the index")
+    parser.add_argument('--query', help="Word or phrase to look up")
+    parser.add_argument('--near', help="Only keep matches with this word/phrase nearby")
+    parser.add_argument('--distance', type=int, default=10)
+    parser.add_argument('--window', type=int, default=CONTEXT_WINDOW)
+    args = parser.parse_args()
+
+    try:
+        lemmas = load_lemmas(args.lemmas) if args.lemmas else None
+        if args.build or not os.path.exists(os.path.join(args.index, 'postings.npy')):
+            print(f"Building the index from '{args.corpus}'...")
+            build_index(args.corpus, args.index, lemmas)
+            print(f"Index has been saved to '{args.index}'")
+        if args.query:
+            index = CorpusIndex(args.index, lemmas)
+            positions = index.near(args.query, args.near, args.distance) if args.near else None
+            lines = index.kwic(args.query, args.window, positions)
+            print("-" * 30)
+            for doc, _, context in lines:
+                print(f"{doc}: {context}")
+            print("-" * 30)
+            print(f"{len(lines)} matches in {len({doc for doc, _, _ in lines})} novels")
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+    except ValueError as e:
+        print(f"ERROR: {e}")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import argparse
+import json
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from concordance import INDEX_DIR, CorpusIndex
+from extract_occurrences import GAZETTEER, load_gazetteer
+from geocoder import Gazetteer
+
+
+OCCURRENCES_FILE = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA/3_GIS toponyms_cities_FILTRATE_data2.csv"
+
+
+def incidence_from_occurrences(occurrences: pd.DataFrame):
+    """
+    Sparse toponym x novel matrix (CSR) from an occurrence table.
+
+    Returns:
+        tuple: (matrix of total_aparitii, toponym names, novel names)
+    """
+    toponyms = pd.Categorical(occurrences['cuvant'])
+    novels = pd.Categorical(occurrences['fisier'])
+    matrix = sparse.csr_matrix(
+        (occurrences['total_aparitii'].to_numpy(np.float64), (toponyms.codes, novels.codes)),
+        shape=(len(toponyms.categories), len(novels.categories)))
+    return matrix, list(toponyms.categories), list(novels.categories)
+
+
+def toponym_events(index: CorpusIndex, toponyms) -> tuple:
+    """
+    All toponym occurrences in the corpus, sorted by position.
+
+    Overlapping names are resolved by longest match, as the extractor does: an
+    occurrence whose tokens lie inside a longer one ('Severin' in 'Turnu Severin',
+    'Argeș' in 'Curtea de Argeș') is dropped, as is the second of two names
+    matching the same tokens.
+
+    Returns:
+        tuple: (positions, toponym ids) as NumPy arrays.
+    """
+    positions, lengths, ids = [], [], []
+    for toponym_id, toponym in enumerate(toponyms):
+        found = index.phrase_positions(toponym)
+        positions.append(found)
+        lengths.append(np.full(len(found), len(index.keys(toponym)), dtype=np.int64))
+        ids.append(np.full(len(found), toponym_id, dtype=np.int64))
+    if not positions:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    positions, lengths, ids = np.concatenate(positions), np.concatenate(lengths), np.concatenate(ids)
+    # By start, the longest first: an event is nested when an earlier one ends at or after its end
+    order = np.lexsort((-lengths, positions))
+    positions, ids = positions[order], ids[order]
+    ends = positions + lengths[order]
+    nested = np.zeros(len(ends), dtype=bool)
+    nested[1:] = ends[1:] <= np.maximum.accumulate(ends)[:-1]
+    return positions[~nested], ids[~nested]
+
+
+def chapter_boundaries(index: CorpusIndex) -> np.ndarray:
+    """Start positions of every chapter: novel starts plus the chapter headings recorded in the index."""
+    if index.chapters is None:
+        raise ValueError("The concordance index has no chapter headings; rebuild it with concordance.py --build")
+    return np.unique(np.concatenate([index.doc_offsets[:-1], index.chapters]))
+
+
+def incidence_from_events(positions, ids, boundaries, n_toponyms: int):
+    """Sparse toponym x segment matrix (CSR), a segment being a novel or a chapter."""
+    segments = np.searchsorted(boundaries, positions, side='right') - 1
+    return sparse.csr_matrix((np.ones(len(ids)), (ids, segments)), shape=(n_toponyms, len(boundaries)))
+
+
+def segment_cooccurrence(incidence) -> sparse.csr_matrix:
+    """
+    Number of segments shared by every pair of toponyms: B @ B.T with B the
+    binary incidence matrix. Only the upper triangle (pairs) is kept.
+    """
+    binary = (incidence > 0).astype(np.float64)
+    return sparse.triu(binary @ binary.T, k=1).tocsr()
+
+
+def window_cooccurrence(positions, ids, doc_of, n_toponyms: int, window: int = 10) -> sparse.csr_matrix:
+    """
+    Counts toponym pairs occurring within window tokens of each other in the same novel.
+
+    The events are sorted by position, so each pass compares every event with the
+    one k places ahead; passes stop as soon as no pair is close enough.
+    """
+    docs = doc_of(positions)
+    rows, cols = [], []
+    k = 1
+    while k < len(positions):
+        gap = positions[k:] - positions[:-k]
+        if not (gap <= window).any():
+            break
+        close = (gap <= window) & (docs[k:] == docs[:-k])
+        a, b = ids[:-k][close], ids[k:][close]
+        different = a != b
+        rows.append(np.minimum(a, b)[different])
+        cols.append(np.maximum(a, b)[different])
+        k += 1
+    if not rows:
+        return sparse.csr_matrix((n_toponyms, n_toponyms))
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    return sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_toponyms, n_toponyms))
+
+
+def segment_marginals(incidence):
+    """Segments containing each toponym, and the number of segments."""
+    return np.asarray((incidence > 0).sum(axis=1)).ravel(), incidence.shape[1]
+
+
+def window_marginals(ids, n_toponyms: int):
+    """Occurrences of each toponym, and the number of toponym occurrences."""
+    return np.bincount(ids, minlength=n_toponyms), len(ids)
+
+
+def edge_table(cooccurrence, marginals, total: int, toponyms, min_count: int = 1) -> pd.DataFrame:
+    """
+    Edges with their co-occurrence count, PMI and normalized PMI, with
+    p(x) = marginals[x] / total and p(x, y) = count / total.
+
+    Args:
+        cooccurrence: Upper-triangular sparse pair counts.
+        marginals: Per-toponym counts (segment_marginals or window_marginals).
+        total: Number of segments or of toponym occurrences.
+    """
+    pairs = cooccurrence.tocoo()
+    keep = pairs.data >= min_count
+    i, j, count = pairs.row[keep], pairs.col[keep], pairs.data[keep]
+
+    total = max(total, 1)
+    p_x = np.asarray(marginals, dtype=np.float64) / total
+    p_xy = np.minimum(count / total, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pmi = np.log(p_xy / (p_x[i] * p_x[j]))
+        npmi = np.where(p_xy < 1, pmi / -np.log(p_xy), 1.0)
+
+    names = np.asarray(toponyms, dtype=object)
+    return pd.DataFrame({
+        'source': names[i], 'target': names[j], 'weight': count.astype(int), 'pmi': pmi, 'npmi': npmi,
+    }).sort_values('weight', ascending=False, ignore_index=True)
+
+
+def _attribute(value) -> str:
+    return escape(str(value), {'"': '&quot;'})
+
+
+def save_graphml(edges: pd.DataFrame, output_file: str, coordinates: pd.DataFrame = None):
+    """Writes the edges as an undirected GraphML graph (node coordinates added when known)."""
+    nodes = pd.unique(edges[['source', 'target']].to_numpy().ravel())
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                '  <key id="lon" for="node" attr.name="Longitude" attr.type="double"/>\n'
+                '  <key id="lat" for="node" attr.name="Latitude" attr.type="double"/>\n'
+                '  <key id="weight" for="edge" attr.name="weight" attr.type="double"/>\n'
+                '  <key id="pmi" for="edge" attr.name="pmi" attr.type="double"/>\n'
+                '  <graph edgedefault="undirected">\n')
+        for node in nodes:
+            f.write(f'    <node id="{_attribute(node)}">')
+            if coordinates is not None and node in coordinates.index and pd.notna(coordinates.at[node, 'Longitude']):
+                f.write(f'<data key="lon">{coordinates.at[node, "Longitude"]}</data>'
+                        f'<data key="lat">{coordinates.at[node, "Latitude"]}</data>')
+            f.write('</node>\n')
+        for edge in edges.itertuples(index=False):
+            f.write(f'    <edge source="{_attribute(edge.source)}" target="{_attribute(edge.target)}">'
+                    f'<data key="weight">{edge.weight}</data><data key="pmi">{edge.pmi}</data></edge>\n')
+        f.write('  </graph>\n</graphml>\n')
+
+
+def save_geojson_lines(edges: pd.DataFrame, coordinates: pd.DataFrame, output_file: str):
+    """Writes the edges whose two toponyms are geocoded as GeoJSON LineStrings."""
+    features = []
+    for edge in edges.itertuples(index=False):
+        if edge.source not in coordinates.index or edge.target not in coordinates.index:
+            continue
+        a, b = coordinates.loc[edge.source], coordinates.loc[edge.target]
+        if a[['Longitude', 'Latitude']].isna().any() or b[['Longitude', 'Latitude']].isna().any():
+            continue
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': [
+                [float(a['Longitude']), float(a['Latitude'])], [float(b['Longitude']), float(b['Latitude'])]]},
+            'properties': {'source': edge.source, 'target': edge.target, 'weight': int(edge.weight),
+                           'pmi': None if not np.isfinite(edge.pmi) else float(edge.pmi)},
+        })
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the toponym co-occurrence network.")
+    parser.add_argument('--level', choices=['novel', 'chapter', 'window'], default='novel')
+    parser.add_argument('--occurrences', default=OCCURRENCES_FILE, help="Occurrence table (novel level)")
+    parser.add_argument('--index', default=INDEX_DIR, help="Concordance index (chapter and window levels)")
+    parser.add_argument('--gazetteer', default=GAZETTEER)
+    parser.add_argument('--window', type=int, default=10, help="Window size in tokens")
+    parser.add_argument('--min-count', type=int, default=1)
+    parser.add_argument('--output', default='cooccurrence_edges')
+    args = parser.parse_args()
+
+    try:
+        if args.level == 'novel':
+            occurrences = pd.read_csv(args.occurrences, encoding='utf-8-sig')
+            incidence, toponyms, _ = incidence_from_occurrences(occurrences)
+            cooccurrence = segment_cooccurrence(incidence)
+            marginals, total = segment_marginals(incidence)
+        else:
+            index = CorpusIndex(args.index)
+            toponyms = load_gazetteer(args.gazetteer)
+            positions, ids = toponym_events(index, toponyms)
+            if args.level == 'chapter':
+                incidence = incidence_from_events(positions, ids, chapter_boundaries(index), len(toponyms))
+                cooccurrence = segment_cooccurrence(incidence)
+                marginals, total = segment_marginals(incidence)
+            else:
+                cooccurrence = window_cooccurrence(positions, ids, index.doc_of, len(toponyms), args.window)
+                marginals, total = window_marginals(ids, len(toponyms))
+
+        edges = edge_table(cooccurrence, marginals, total, toponyms, args.min_count)
+        geocoded = Gazetteer.from_file(args.gazetteer).geocode(pd.Series(toponyms))
+        coordinates = geocoded[['Longitude', 'Latitude']].set_axis(toponyms)
+
+        edges.to_csv(f"{args.output}.csv", index=False, encoding='utf-8-sig')
+        save_graphml(edges, f"{args.output}.graphml", coordinates)
+        save_geojson_lines(edges, coordinates, f"{args.output}.geojson")
+
+        print("-" * 30)
+        print(f"Co-occurrence network ({args.level} level) complete!")
+        print(f"Toponyms: {len(toponyms)}, edges: {len(edges)}")
+        print(f"Saved to '{args.output}.csv', '.graphml' and '.geojson'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+    except ValueError as e:
+        print(f"ERROR: {e}")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import argparse
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+from regions import REGIONS_FILE, load_regions, points_in_regions
+from spatial_index import read_table
+
+
+# Coordinates with fewer decimals than this are reported as low precision (2 decimals ~ 1 km)
+MIN_DECIMALS = 3
+# Rounding used to find duplicated points (5 decimals ~ 1 m)
+DUPLICATE_DECIMALS = 5
+# A file is considered swapped when swapping puts clearly more points inside the regions
+SWAP_MIN_GAIN = 0.5
+# Whole numbers in this range are degrees typed without their decimal point ('23303' for 23.303)
+LOST_DECIMAL_RANGE = (10000, 99999)
+# Columns added by validate_coordinates
+FLAG_COLUMNS = ['decimal_repaired', 'invalid', 'out_of_range', 'outside_regions', 'duplicate', 'low_precision']
+
+
+@functools.lru_cache(maxsize=None)
+def default_regions() -> dict:
+    """The bundled region polygons, loaded once (empty if the file is missing)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), REGIONS_FILE)
+    return load_regions(path) if os.path.exists(path) else {}
+
+
+def count_decimals(values, max_decimals: int = 8) -> np.ndarray:
+    """Number of significant decimals of each value (vectorized, up to max_decimals)."""
+    values = np.abs(np.asarray(values, dtype=np.float64))
+    decimals = np.full(values.shape, max_decimals, dtype=np.int64)
+    # Walk from the most decimals down, so each value keeps the smallest count that represents it
+    for d in range(max_decimals - 1, -1, -1):
+        scaled = values * 10.0 ** d
+        decimals[np.isclose(scaled, np.round(scaled), rtol=0, atol=1e-6)] = d
+    return decimals
+
+
+def repair_lost_decimals(values):
+    """
+    Puts back the decimal point of 5-digit whole numbers, read as dd.ddd
+    (23303 -> 23.303, 44963 -> 44.963).
+
+    Returns:
+        tuple: (repaired values, mask of the repaired values)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    low, high = LOST_DECIMAL_RANGE
+    magnitude = np.abs(values)
+    with np.errstate(invalid='ignore'):
+        lost = (magnitude >= low) & (magnitude <= high) & (values == np.round(values))
+    return np.where(lost, values / 1000, values), lost
+
+
+def row_labels(df: pd.DataFrame, mask) -> list:
+    """Names of the masked rows (row numbers when the layer has no Name column), for reports."""
+    if 'Name' in df:
+        return [str(name) for name in df['Name'].to_numpy()[mask]]
+    return [f"row {i}" for i in np.flatnonzero(mask)]
+
+
+def detect_swapped_axes(lon, lat, regions: dict):
+    """
+    Compares how many points fall inside the regions as stored and with the axes swapped.
+
+    Returns:
+        tuple: (is_swapped, share inside as stored, share inside when swapped)
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    if lon.size == 0:
+        return False, 0.0, 0.0
+    share_as_is = points_in_regions(lon, lat, regions).mean()
+    share_swapped = points_in_regions(lat, lon, regions).mean()
+    return bool(share_swapped - share_as_is >= SWAP_MIN_GAIN), float(share_as_is), float(share_swapped)
+
+
+def validate_coordinates(df: pd.DataFrame, regions: dict, fix_swapped: bool = True, fix_decimals: bool = True):
+    """
+    Validates the Longitude / Latitude columns of a layer in a few NumPy passes.
+
+    The added columns are:
+        decimal_repaired - a coordinate lost its decimal point and got it back (fix_decimals)
+        invalid         - missing or not a number
+        out_of_range    - outside [-180, 180] x [-90, 90]
+        outside_regions - valid, but outside every historical region polygon
+        duplicate       - same coordinates (rounded) as an earlier row
+        low_precision   - fewer than MIN_DECIMALS decimals on both axes
+
+    Returns:
+        tuple: (validated DataFrame, summary dict). When the axes of the whole
+        file are detected as swapped (and fix_swapped is set) they are swapped back.
+    """
+    df = df.copy()
+    lon = pd.to_numeric(df['Longitude'], errors='coerce').to_numpy(dtype=np.float64)
+    lat = pd.to_numeric(df['Latitude'], errors='coerce').to_numpy(dtype=np.float64)
+    decimal_repaired = np.zeros(len(df), dtype=bool)
+    if fix_decimals:
+        lon, lon_repaired = repair_lost_decimals(lon)
+        lat, lat_repaired = repair_lost_decimals(lat)
+        decimal_repaired = lon_repaired | lat_repaired
+    invalid = np.isnan(lon) | np.isnan(lat)
+
+    swapped, share_as_is, share_swapped = detect_swapped_axes(lon[~invalid], lat[~invalid], regions)
+    if swapped and fix_swapped:
+        lon, lat = lat, lon
+
+    out_of_range = ~invalid & ((np.abs(lon) > 180) | (np.abs(lat) > 90))
+    usable = ~invalid & ~out_of_range
+    outside_regions = usable.copy()
+    outside_regions[usable] = ~points_in_regions(lon[usable], lat[usable], regions)
+
+    duplicate = np.zeros(len(df), dtype=bool)
+    rounded = np.round(np.column_stack((lon, lat))[usable], DUPLICATE_DECIMALS)
+    if len(rounded):
+        _, first_index = np.unique(rounded, axis=0, return_index=True)
+        repeated = np.ones(len(rounded), dtype=bool)
+        repeated[first_index] = False
+        duplicate[np.flatnonzero(usable)[repeated]] = True
+
+    low_precision = np.zeros(len(df), dtype=bool)
+    low_precision[usable] = (count_decimals(lon[usable]) < MIN_DECIMALS) & (count_decimals(lat[usable]) < MIN_DECIMALS)
+
+    df['Longitude'] = lon
+    df['Latitude'] = lat
+    df['decimal_repaired'] = decimal_repaired
+    df['invalid'] = invalid
+    df['out_of_range'] = out_of_range
+    df['outside_regions'] = outside_regions
+    df['duplicate'] = duplicate
+    df['low_precision'] = low_precision
+
+    summary = {
+        'rows': len(df),
+        'swapped_axes': swapped,
+        'inside_as_stored': share_as_is,
+        'inside_swapped': share_swapped,
+        'decimal_repaired': int(decimal_repaired.sum()),
+        'decimal_repaired_names': row_labels(df, decimal_repaired),
+        'invalid': int(invalid.sum()),
+        'invalid_names': row_labels(df, invalid),
+        'out_of_range': int(out_of_range.sum()),
+        'out_of_range_names': row_labels(df, out_of_range),
+        'outside_regions': int(outside_regions.sum()),
+        'duplicate': int(duplicate.sum()),
+        'low_precision': int(low_precision.sum()),
+    }
+    return df, summary
+
+
+def repair_layer(df: pd.DataFrame, regions: dict = None):
+    """
+    Validation applied to every layer on read and on ingest: lost decimal points
+    are put back, swapped axes are swapped back, and rows with invalid or (still)
+    out-of-range coordinates are dropped; describe_repairs names them.
+    Points outside the regions, duplicates and low-precision points are kept.
+
+    Returns:
+        tuple: (usable rows with numeric Longitude / Latitude, summary dict of validate_coordinates)
+    """
+    validated, summary = validate_coordinates(df, default_regions() if regions is None else regions)
+    usable = ~(validated['invalid'] | validated['out_of_range'])
+    return validated[usable].drop(columns=FLAG_COLUMNS).reset_index(drop=True), summary
+
+
+def describe_repairs(summary: dict) -> str:
+    """Short description of what repair_layer changed ('' when nothing)."""
+    repairs = []
+    if summary['swapped_axes']:
+        repairs.append(f"longitude/latitude swapped back ({summary['inside_swapped']:.0%} inside the regions "
+                       f"when swapped, {summary['inside_as_stored']:.0%} as stored)")
+    if summary['decimal_repaired']:
+        repairs.append(f"{summary['decimal_repaired']} rows with a lost decimal point repaired "
+                       f"({', '.join(summary['decimal_repaired_names'])})")
+    if summary['invalid']:
+        repairs.append(f"{summary['invalid']} rows without valid coordinates dropped "
+                       f"({', '.join(summary['invalid_names'])})")
+    if summary['out_of_range']:
+        repairs.append(f"{summary['out_of_range']} rows with out-of-range coordinates dropped "
+                       f"({', '.join(summary['out_of_range_names'])})")
+    return '; '.join(repairs)
+
+
+class GeoTransform:
+    """
+    Batched polynomial transform between WGS84 (lon/lat) and the pixel space of the
+    georeferenced 1817 base map, fitted by least squares on ground control points.
+    order=1 is an affine transform, order=2 a second-order polynomial (as in QGIS).
+    """
+
+    def __init__(self, lonlat, pixels, order: int = 1):
+        self.order = order
+        lonlat = np.asarray(lonlat, dtype=np.float64)
+        pixels = np.asarray(pixels, dtype=np.float64)
+        self._lonlat_center = lonlat.mean(axis=0)
+        self._pixel_center = pixels.mean(axis=0)
+        # Coordinates are centred before fitting to keep the system well conditioned
+        self._to_pixel, *_ = np.linalg.lstsq(self._terms(lonlat - self._lonlat_center), pixels, rcond=None)
+        self._to_lonlat, *_ = np.linalg.lstsq(self._terms(pixels - self._pixel_center), lonlat, rcond=None)
+
+    @classmethod
+    def from_points_file(cls, path: str, order: int = 1) -> 'GeoTransform':
+        """
+        Reads a QGIS georeferencer .points file (mapX, mapY, sourceX, sourceY, enable ...).
+        QGIS stores sourceY as a negative row number, so the sign is flipped.
+        """
+        gcp = pd.read_csv(path, comment='#')
+        if 'enable' in gcp:
+            gcp = gcp[gcp['enable'] == 1]
+        return cls(gcp[['mapX', 'mapY']].to_numpy(), np.column_stack((gcp['sourceX'], -gcp['sourceY'])), order)
+
+    def _terms(self, xy: np.ndarray) -> np.ndarray:
+        x, y = xy[:, 0], xy[:, 1]
+        columns = [np.ones_like(x), x, y]
+        if self.order >= 2:
+            columns += [x * x, x * y, y * y]
+        if self.order >= 3:
+            columns += [x ** 3, x * x * y, x * y * y, y ** 3]
+        return np.column_stack(columns)
+
+    def to_pixel(self, lon, lat) -> np.ndarray:
+        """WGS84 -> base-map pixel (column, row), shape (n, 2)."""
+        lonlat = np.column_stack((np.atleast_1d(lon), np.atleast_1d(lat))).astype(np.float64)
+        return self._terms(lonlat - self._lonlat_center) @ self._to_pixel
+
+    def to_lonlat(self, column, row) -> np.ndarray:
+        """Base-map pixel (column, row) -> WGS84 lon/lat, shape (n, 2)."""
+        pixels = np.column_stack((np.atleast_1d(column), np.atleast_1d(row))).astype(np.float64)
+        return self._terms(pixels - self._pixel_center) @ self._to_lonlat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate (and repair) the coordinates of layer files.")
+    parser.add_argument('files', nargs='+', help="Layer files (CSV or XLSX)")
+    parser.add_argument('--regions', default=REGIONS_FILE)
+    parser.add_argument('--output-dir', default='validated')
+    parser.add_argument('--no-fix', action='store_true', help="Only report, do not repair decimals or swap axes back")
+    args = parser.parse_args()
+
+    try:
+        regions = load_regions(args.regions)
+        os.makedirs(args.output_dir, exist_ok=True)
+        for path in args.files:
+            df, summary = validate_coordinates(read_table(path), regions, fix_swapped=not args.no_fix, fix_decimals=not args.no_fix)
+            output_file = os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + '.csv')
+            df.to_csv(output_file, index=False, encoding='utf-8-sig')
+
+            print("-" * 30)
+            print(f"File: {path}")
+            if summary['swapped_axes']:
+                print(f"  Axes look SWAPPED ({summary['inside_as_stored']:.0%} inside the regions as stored, "
+                      f"{summary['inside_swapped']:.0%} when swapped)" + ("" if args.no_fix else " - fixed"))
+            for key in ['rows'] + FLAG_COLUMNS:
+                print(f"  {key}: {summary[key]}")
+            print(f"  Validated data has been saved to '{output_file}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
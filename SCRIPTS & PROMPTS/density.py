@@ -0,0 +1,185 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.signal import fftconvolve
+
+from hotspot_clustering import load_layers
+from regions import load_regions, parse_layer_argument, points_in_regions
+from spatial_index import EARTH_RADIUS_KM
+
+
+# [min_lon, max_lon, min_lat, max_lat], same order as the extents in map_specs.json
+MAP_EXTENT = (20.0, 30.5, 43.4, 48.5)
+CELL_DEGREES = 0.02
+# The Gaussian kernel is cut off at this many standard deviations
+KERNEL_TRUNCATE = 4.0
+HAJDUK_LAYER = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA/1_LISTA DARIAH GEOBROWSER PROJECT_romane haiducesti Romania.csv"
+
+
+class Grid:
+    """
+    Regular lon/lat raster. Row 0 is the northern edge (as in GeoTIFF and
+    ASCII grids), column 0 the western edge.
+    """
+
+    def __init__(self, extent=MAP_EXTENT, cell_degrees: float = CELL_DEGREES):
+        self.min_lon, self.max_lon, self.min_lat, self.max_lat = map(float, extent)
+        self.cell = float(cell_degrees)
+        self.n_cols = int(np.ceil((self.max_lon - self.min_lon) / self.cell))
+        self.n_rows = int(np.ceil((self.max_lat - self.min_lat) / self.cell))
+        self.max_lon = round(self.min_lon + self.n_cols * self.cell, 10)
+        self.max_lat = round(self.min_lat + self.n_rows * self.cell, 10)
+
+    @property
+    def shape(self) -> tuple:
+        return self.n_rows, self.n_cols
+
+    @property
+    def extent(self) -> list:
+        return [self.min_lon, self.max_lon, self.min_lat, self.max_lat]
+
+    def cell_km(self) -> tuple:
+        """Width and height of a cell in km, at the grid's middle latitude."""
+        height = np.radians(self.cell) * EARTH_RADIUS_KM
+        width = height * np.cos(np.radians((self.min_lat + self.max_lat) / 2))
+        return width, height
+
+    def centers(self) -> tuple:
+        """Longitude and latitude of every cell centre, each of shape (n_rows, n_cols)."""
+        lon = self.min_lon + (np.arange(self.n_cols) + 0.5) * self.cell
+        lat = self.max_lat - (np.arange(self.n_rows) + 0.5) * self.cell
+        return np.meshgrid(lon, lat)
+
+    def bin_points(self, lon, lat, weights=None) -> np.ndarray:
+        """Point counts (or summed weights) per cell; points outside the grid are dropped."""
+        counts, _, _ = np.histogram2d(
+            np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64),
+            bins=(self.n_rows, self.n_cols),
+            range=((self.min_lat, self.max_lat), (self.min_lon, self.max_lon)),
+            weights=weights,
+        )
+        return counts[::-1]
+
+
+def gaussian_kernel(sigma_x: float, sigma_y: float) -> np.ndarray:
+    """Normalized 2-D Gaussian kernel, with standard deviations given in cells."""
+    half_x = max(int(np.ceil(KERNEL_TRUNCATE * sigma_x)), 1)
+    half_y = max(int(np.ceil(KERNEL_TRUNCATE * sigma_y)), 1)
+    x = np.arange(-half_x, half_x + 1) / max(sigma_x, 1e-9)
+    y = np.arange(-half_y, half_y + 1) / max(sigma_y, 1e-9)
+    kernel = np.exp(-0.5 * (y[:, None] ** 2 + x[None, :] ** 2))
+    return kernel / kernel.sum()
+
+
+def density_surface(counts: np.ndarray, grid: Grid, bandwidth_km: float) -> np.ndarray:
+    """
+    Kernel density of a binned layer, by FFT convolution with a Gaussian of
+    standard deviation bandwidth_km.
+
+    Returns:
+        np.ndarray: Points per km², same shape as counts (the total mass is kept,
+        apart from what the kernel spreads beyond the grid's edges).
+    """
+    width, height = grid.cell_km()
+    kernel = gaussian_kernel(bandwidth_km / width, bandwidth_km / height)
+    smoothed = fftconvolve(counts, kernel, mode='same')
+    # FFT round-off leaves tiny negative values in empty areas
+    return np.clip(smoothed, 0, None) / (width * height)
+
+
+def layer_surfaces(points: pd.DataFrame, grid: Grid, bandwidths_km) -> dict:
+    """
+    Density surfaces for every layer and bandwidth. Each layer is binned once and
+    then convolved once per bandwidth.
+
+    Returns:
+        dict: (layer, bandwidth) -> surface.
+    """
+    surfaces = {}
+    for layer, group in points.groupby('layer', sort=False):
+        counts = grid.bin_points(group['Longitude'], group['Latitude'], group['weight'].to_numpy())
+        for bandwidth in bandwidths_km:
+            surfaces[(layer, bandwidth)] = density_surface(counts, grid, bandwidth)
+    return surfaces
+
+
+def correlation_matrix(surfaces: dict, mask: np.ndarray = None) -> pd.DataFrame:
+    """
+    Pearson correlation between surfaces (cell by cell), optionally restricted to a mask.
+
+    Args:
+        surfaces (dict): Name -> surface, all on the same grid.
+        mask (np.ndarray): Boolean raster of the cells to compare.
+    """
+    names = list(surfaces)
+    values = np.stack([surfaces[name][mask] if mask is not None else surfaces[name].ravel() for name in names])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = np.corrcoef(values)
+    return pd.DataFrame(np.atleast_2d(corr), index=names, columns=names)
+
+
+def region_mask(grid: Grid, regions: dict) -> np.ndarray:
+    """Cells whose centre lies inside any of the regions."""
+    lon, lat = grid.centers()
+    return points_in_regions(lon.ravel(), lat.ravel(), regions).reshape(grid.shape)
+
+
+def save_ascii_grid(surface: np.ndarray, grid: Grid, output_file: str):
+    """Writes a surface as an ESRI ASCII grid (.asc), which QGIS opens as a raster layer."""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(f"ncols {grid.n_cols}\nnrows {grid.n_rows}\n"
+                f"xllcorner {grid.min_lon}\nyllcorner {grid.min_lat}\n"
+                f"cellsize {grid.cell}\nNODATA_value -9999\n")
+        np.savetxt(f, surface, fmt='%.6g')
+
+
+def file_stem(layer: str, bandwidth: float) -> str:
+    return f"{layer.replace(' ', '_').replace('/', '_')}_bw{bandwidth:g}km"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kernel density surfaces and layer x layer correlations.")
+    parser.add_argument('--layer', action='append', type=parse_layer_argument,
+                        help="Point layer as NAME=PATH (CSV or XLSX). Can be repeated.")
+    parser.add_argument('--bandwidths', type=float, nargs='+', default=[10.0, 25.0], help="Gaussian bandwidths in km")
+    parser.add_argument('--extent', type=float, nargs=4, default=list(MAP_EXTENT),
+                        metavar=('MIN_LON', 'MAX_LON', 'MIN_LAT', 'MAX_LAT'))
+    parser.add_argument('--cell', type=float, default=CELL_DEGREES, help="Cell size in degrees")
+    parser.add_argument('--regions', help="Only correlate the cells inside these regions (GeoJSON)")
+    parser.add_argument('--asc', action='store_true', help="Also write ESRI ASCII grids for QGIS")
+    parser.add_argument('--output-dir', default='density')
+    args = parser.parse_args()
+
+    layer_files = dict(args.layer) if args.layer else {'Hajduk novels': HAJDUK_LAYER}
+
+    try:
+        grid = Grid(args.extent, args.cell)
+        surfaces = layer_surfaces(load_layers(layer_files), grid, args.bandwidths)
+        mask = region_mask(grid, load_regions(args.regions)) if args.regions else None
+
+        os.makedirs(args.output_dir, exist_ok=True)
+        for (layer, bandwidth), surface in surfaces.items():
+            np.save(os.path.join(args.output_dir, file_stem(layer, bandwidth) + '.npy'), surface)
+            if args.asc:
+                save_ascii_grid(surface, grid, os.path.join(args.output_dir, file_stem(layer, bandwidth) + '.asc'))
+
+        print("-" * 30)
+        print(f"Density surfaces complete! Grid {grid.n_rows} x {grid.n_cols}, extent {grid.extent}")
+        for bandwidth in args.bandwidths:
+            corr = correlation_matrix({layer: s for (layer, bw), s in surfaces.items() if bw == bandwidth}, mask)
+            corr_file = os.path.join(args.output_dir, f"correlation_bw{bandwidth:g}km.csv")
+            corr.to_csv(corr_file, encoding='utf-8-sig')
+            print(f"Bandwidth {bandwidth:g} km:")
+            print(corr.round(3))
+        print(f"Rasters and correlation matrices have been saved to '{args.output_dir}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
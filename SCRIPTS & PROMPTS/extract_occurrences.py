@@ -0,0 +1,240 @@
+import argparse
+import csv
+import os
+import re
+import unicodedata
+import zipfile
+from multiprocessing import Pool
+
+
+CORPUS_ZIP = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA/HAI-RO_txt 2.zip"
+GAZETTEER = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA/1_LISTA DARIAH GEOBROWSER PROJECT_romane haiducesti Romania.csv"
+
+# Same schema as data.csv / 5_backup_data.csv, so filter_localities.py keeps working
+OUTPUT_HEADER = ['cuvant', 'fisier', 'total_aparitii', 'contexte']
+CONTEXT_SEPARATOR = ' ||| '
+CONTEXT_WINDOW = 5
+
+# Words (keeping inner hyphens, e.g. 'Balta-Verde') and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\w+(?:[-'’]\w+)*|[^\w\s]")
+
+# Old cedilla forms are folded onto the comma-below letters used in the gazetteer
+CEDILLA_TO_COMMA = str.maketrans({'ş': 'ș', 'Ş': 'Ș', 'ţ': 'ț', 'Ţ': 'Ț'})
+
+
+def normalize_token(token: str) -> str:
+    """Key used for matching: cedilla/comma-below folded and case-insensitive."""
+    return token.translate(CEDILLA_TO_COMMA).casefold()
+
+
+def load_lemmas(path: str) -> dict:
+    """Reads a 'form<TAB>lemma' file (one pair per line) into a normalized form -> lemma map."""
+    lemmas = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            form, sep, lemma = line.rstrip('\n').partition('\t')
+            if sep and form and lemma:
+                lemmas[normalize_token(form)] = normalize_token(lemma)
+    return lemmas
+
+
+def match_keys(tokens, lemmas: dict = None) -> list:
+    """Normalized match keys of a token list, reduced to their lemma when a lemma map is given."""
+    keys = [normalize_token(t) for t in tokens]
+    if lemmas:
+        keys = [lemmas.get(key, key) for key in keys]
+    return keys
+
+
+def collation_key(word: str):
+    """Approximates the Romanian alphabetical order used in the existing tables."""
+    base = ''.join(c for c in unicodedata.normalize('NFD', word) if not unicodedata.combining(c))
+    return base.casefold(), word
+
+
+def load_gazetteer(path: str) -> list:
+    """
+    Reads toponyms either from a plain text file (one per line) or from a CSV
+    with a 'Name' or 'cuvant' column (e.g. the DARIAH list or an occurrence table).
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        if not path.lower().endswith('.csv'):
+            names = [line.strip() for line in f]
+        else:
+            reader = csv.DictReader(f)
+            column = next((c for c in ('Name', 'cuvant') if c in reader.fieldnames), reader.fieldnames[0])
+            names = [row[column].strip() for row in reader if row[column]]
+    # dict.fromkeys keeps the first spelling and drops duplicates
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def build_automaton(toponyms, lemmas: dict = None) -> dict:
+    """
+    Builds a token-level multi-pattern automaton (a trie keyed by normalized tokens).
+    Every text is then scanned once, whatever the number of toponyms.
+
+    Args:
+        lemmas (dict): Optional form -> lemma map (see load_lemmas); toponyms are then
+            keyed by lemma, so inflected forms ('Moldovei', 'Ardealului') match too.
+
+    Returns:
+        dict: first token -> list of (remaining tokens, toponym), longest first.
+    """
+    automaton = {}
+    for toponym in toponyms:
+        keys = match_keys(TOKEN_PATTERN.findall(toponym), lemmas)
+        if not keys:
+            continue
+        automaton.setdefault(keys[0], []).append((tuple(keys[1:]), toponym))
+    for candidates in automaton.values():
+        candidates.sort(key=lambda c: len(c[0]), reverse=True)
+    return automaton
+
+
+def find_occurrences(text: str, automaton: dict, window: int = CONTEXT_WINDOW, lemmas: dict = None) -> dict:
+    """
+    Scans a text once and collects the contexts of every toponym it contains.
+    The lemma map must be the one the automaton was built with.
+
+    Returns:
+        dict: toponym -> list of context snippets (one per occurrence).
+    """
+    tokens = TOKEN_PATTERN.findall(text)
+    keys = match_keys(tokens, lemmas)
+    found = {}
+    i = 0
+    while i < len(keys):
+        candidates = automaton.get(keys[i])
+        match = None
+        if candidates:
+            for rest, toponym in candidates:
+                end = i + 1 + len(rest)
+                if tuple(keys[i + 1:end]) == rest:
+                    match = (end, toponym)
+                    break
+        if match is None:
+            i += 1
+            continue
+        end, toponym = match
+        context = ' '.join(tokens[max(0, i - window):end + window])
+        found.setdefault(toponym, []).append(context)
+        i = end
+    return found
+
+
+def iter_corpus_members(zip_path: str):
+    """Lists the novels inside the corpus zip, skipping folders and macOS metadata."""
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or not name.endswith('.txt'):
+                continue
+            yield name
+
+
+# --- Worker side: each process opens the zip and builds the automaton only once ---
+_worker_archive = None
+_worker_automaton = None
+_worker_lemmas = None
+
+
+def _init_worker(zip_path, toponyms, lemmas):
+    global _worker_archive, _worker_automaton, _worker_lemmas
+    _worker_archive = zipfile.ZipFile(zip_path)
+    _worker_automaton = build_automaton(toponyms, lemmas)
+    _worker_lemmas = lemmas
+
+
+def _scan_member(member_name):
+    text = _worker_archive.read(member_name).decode('utf-8', errors='replace')
+    return os.path.basename(member_name), find_occurrences(text, _worker_automaton, lemmas=_worker_lemmas)
+
+
+def scan_members(zip_path: str, toponyms, members, processes: int = None, lemmas: dict = None):
+    """
+    Scans the given novels of the corpus zip on a process pool.
+
+    Yields:
+        tuple: (member name, file name, toponym -> contexts), in the order of members.
+    """
+    members = list(members)
+    if not members:
+        return
+    with Pool(processes, initializer=_init_worker, initargs=(zip_path, list(toponyms), lemmas)) as pool:
+        # imap keeps the corpus order, so the output is deterministic
+        for member_name, (file_name, found) in zip(members, pool.imap(_scan_member, members)):
+            yield member_name, file_name, found
+
+
+def occurrence_rows(found_per_file) -> list:
+    """
+    Rows [cuvant, fisier, total_aparitii, contexte] from (file name, toponym -> contexts)
+    pairs given in corpus order, sorted by toponym.
+    """
+    rows = []
+    for file_name, found in found_per_file:
+        for toponym, contexts in found.items():
+            rows.append([toponym, file_name, len(contexts), CONTEXT_SEPARATOR.join(contexts)])
+    # sort is stable: files stay in corpus order for each toponym
+    rows.sort(key=lambda row: collation_key(row[0]))
+    return rows
+
+
+def extract_occurrences(zip_path: str, toponyms, processes: int = None, lemmas: dict = None) -> list:
+    """
+    Streams every novel straight out of the corpus zip and counts toponym
+    occurrences, spreading the novels across a process pool.
+
+    Args:
+        zip_path (str): Path to the HAI-RO corpus zip.
+        toponyms (list): Gazetteer of toponyms to look for.
+        processes (int): Number of worker processes (default: all cores).
+        lemmas (dict): Optional form -> lemma map, to count inflected forms.
+
+    Returns:
+        list: Rows [cuvant, fisier, total_aparitii, contexte], sorted by toponym.
+    """
+    scanned = scan_members(zip_path, toponyms, iter_corpus_members(zip_path), processes, lemmas)
+    return occurrence_rows((file_name, found) for _, file_name, found in scanned)
+
+
+def save_occurrences(rows, output_file: str):
+    """Writes the rows with the same quoting and line endings as data.csv."""
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile, lineterminator='\n')
+        writer.writerow(OUTPUT_HEADER)
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract toponym occurrences from the HAI-RO corpus zip.")
+    parser.add_argument('--corpus', default=CORPUS_ZIP)
+    parser.add_argument('--gazetteer', default=GAZETTEER)
+    parser.add_argument('--lemmas', help="Optional form<TAB>lemma file, to count inflected forms")
+    # data.csv is the committed reference table; it is only overwritten when asked for explicitly
+    parser.add_argument('--output', default='occurrences.csv')
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        toponyms = load_gazetteer(args.gazetteer)
+        print(f"Loaded {len(toponyms)} toponyms from '{args.gazetteer}'")
+        lemmas = load_lemmas(args.lemmas) if args.lemmas else None
+        if lemmas:
+            print(f"Loaded {len(lemmas)} word forms from '{args.lemmas}'")
+        rows = extract_occurrences(args.corpus, toponyms, args.processes, lemmas)
+        save_occurrences(rows, args.output)
+
+        print("-" * 30)
+        print(f"Extraction complete!")
+        print(f"Number of (toponym, novel) rows: {len(rows)}")
+        print(f"Occurrences have been saved to '{args.output}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
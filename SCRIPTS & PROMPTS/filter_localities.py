@@ -1,92 +1,159 @@
+import argparse
+import os
+
+import numpy as np
 import pandas as pd
 
+from instrumentation import add_arguments, count, instrumented_run, timer
+
+
+LEXICONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicons')
+WHITELIST_FILE = os.path.join(LEXICONS_DIR, 'localities_whitelist.txt')
+BLACKLIST_FILE = os.path.join(LEXICONS_DIR, 'non_localities_blacklist.txt')
+
+# Name of the rule that decided each word (reported in the 'rule' column)
+RULE_INVALID = 'invalid'
+RULE_WHITELIST = 'whitelist'
+RULE_BLACKLIST = 'blacklist'
+RULE_CAPITALIZED = 'capitalized'
+RULE_LOWERCASE = 'lowercase'
+LOCALITY_RULES = (RULE_WHITELIST, RULE_CAPITALIZED)
+
+
+def load_lexicon(path: str) -> frozenset:
+    """Reads a lexicon file: one word per line, '#' starts a comment line."""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return frozenset(
+            line.strip() for line in f
+            if line.strip() and not line.lstrip().startswith('#')
+        )
+
+
+class LocalityClassifier:
+    """
+    Decides whether words are likely cities or villages based on a
+    whitelist, a blacklist, and capitalization.
+
+    The lexicons are loaded once, and whole columns are classified in a
+    single vectorized pass instead of calling a function row by row.
+    """
+
+    def __init__(self, whitelist_file: str = WHITELIST_FILE, blacklist_file: str = BLACKLIST_FILE):
+        self.whitelist = load_lexicon(whitelist_file)
+        self.blacklist = load_lexicon(blacklist_file)
+
+    def rule(self, word) -> str:
+        """Name of the rule that decides a single word."""
+        # Non-strings (NaN, numbers) behave like empty words
+        if not isinstance(word, str) or not word.strip():
+            return RULE_INVALID
+        # Normalize the word for checking (e.g., remove leading/trailing spaces)
+        word_normalized = word.strip()
+        # Rule 1: If it's in our high-confidence whitelist, it's a locality.
+        if word_normalized in self.whitelist:
+            return RULE_WHITELIST
+        # Rule 2: If it's in our blacklist, it's definitely NOT a locality.
+        if word_normalized in self.blacklist:
+            return RULE_BLACKLIST
+        # Rule 3: Fallback rule. If it's capitalized and not blacklisted,
+        # assume it's a smaller village or locality we don't have on our lists.
+        return RULE_CAPITALIZED if word_normalized[0].isupper() else RULE_LOWERCASE
+
+    def classify(self, words) -> pd.DataFrame:
+        """
+        Classifies a whole column of words.
+
+        The column is factorized first, so the rules run once per distinct word
+        (a few hundred in data.csv) and the result is broadcast back to the rows.
+
+        Args:
+            words: A pandas Series, a pyarrow Array/ChunkedArray or any list-like of words.
+
+        Returns:
+            pd.DataFrame: Columns 'is_locality' (bool) and 'rule' (the rule that
+            decided each row), aligned with the input index.
+        """
+        if hasattr(words, 'to_pandas'):
+            words = words.to_pandas()
+        words = pd.Series(words)
+
+        codes, uniques = pd.factorize(words)
+        # Missing values get the code -1, which picks the trailing RULE_INVALID
+        unique_rules = np.array([self.rule(word) for word in uniques] + [RULE_INVALID], dtype=object)
+        rule = unique_rules.take(codes)
+        is_locality = np.isin(rule, LOCALITY_RULES)
+        return pd.DataFrame({'is_locality': is_locality, 'rule': rule}, index=words.index)
+
+    def mask(self, words) -> pd.Series:
+        """Boolean mask of the words that are localities."""
+        return self.classify(words)['is_locality']
+
+    def is_a_locality(self, word: str) -> bool:
+        """Classifies a single word (same rules as classify)."""
+        return self.rule(word) in LOCALITY_RULES
+
+
+_default_classifier = None
+
+
+def get_default_classifier() -> LocalityClassifier:
+    """Classifier built from the bundled lexicons, loaded on first use."""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = LocalityClassifier()
+    return _default_classifier
+
 
 def is_a_locality(word: str) -> bool:
     """
     Determines if a word is likely a city or village based on a
     whitelist, a blacklist, and capitalization.
     """
-    if not isinstance(word, str) or not word:
-        return False
-
-    # A set provides very fast lookups (O(1) on average)
-
-    # Whitelist of major Romanian cities/towns to ensure they are always included.
-    # This can be expanded.
-    LOCALITIES_WHITELIST = {
-        'Adjud', 'Aiud', 'Alba Iulia', 'Alexandria', 'Arad', 'Bacău', 'Baia Mare', 'Bârlad', 'Bechet',
-        'Bistrița', 'Botoșani', 'Brăila', 'Brașov', 'București', 'Buzău', 'Călărași',
-        'Câmpina', 'Câmpulung', 'Caracal', 'Cluj-Napoca', 'Constanța', 'Craiova',
-        'Deva', 'Dorohoi', 'Drobeta-Turnu Severin', 'Făgăraș', 'Focșani', 'Galați',
-        'Giurgiu', 'Hunedoara', 'Iași', 'Lugoj', 'Mediaș', 'Miercurea Ciuc', 'Oradea',
-        'Panciu', 'Petroșani', 'Piatra Neamț', 'Pitești', 'Ploiești', 'Rădăuți', 'Reșița',
-        'Râmnicu Vâlcea', 'Roman', 'Satu Mare', 'Sebeș', 'Sfântu Gheorghe', 'Sibiu',
-        'Sighișoara', 'Slatina', 'Slobozia', 'Suceava', 'Târgoviște', 'Târgu Jiu',
-        'Târgu Mureș', 'Tecuci', 'Timișoara', 'Tulcea', 'Turnu Măgurele', 'Vaslui', 'Zalău'
-    }
-
-    # Blacklist of capitalized words that are NOT cities/villages (countries, regions, rivers, etc.)
-    NON_LOCALITIES_BLACKLIST = {
-        'Albania', 'Ardeal', 'Asia', 'Austerlitz', 'Austria', 'Balcani', 'Banat', 'Basarabia',
-        'Bahlui', 'Bârlăzel', 'Bistrița', 'Bîsca', 'Bosfor', 'Bucegi', 'Bugeac', 'Buila',
-        'Bulgaria', 'Carpați', 'Cefalonia', 'Colomea', 'Constantinopol', 'Covurlui', 'Cozia',
-        'Cracău', 'Cracovia', 'Crimeea', 'Dalmația', 'Dobrogea', 'Dunăre', 'Eforie', 'Europa',
-        'Fanar', 'Fetislam', 'Galiția', 'Grecia', 'Istru', 'Izei', 'Lotru', 'Macedonia', 'Maramureș',
-        'Milcov', 'Moldova', 'Motru', 'Muntenia', 'Neajlov', 'Nistru', 'Oituz', 'Olimp',
-        'Oltenia', 'Olt', 'Ozana', 'Pelopones', 'Penteleu', 'Pind', 'Plevna', 'Polonia', 'Prahova',
-        'Prut', 'România', 'Rusia', 'Serbia', 'Severin', 'Siret', 'Soloneț', 'Tesalia', 'Tisa',
-        'Transilvania', 'Trotuș', 'Turcia', 'Tutova', 'Ungaria', 'Vâlcea', 'Vlăsia'
-    }
-
-    # Normalize the word for checking (e.g., remove leading/trailing spaces)
-    word_normalized = word.strip()
-
-    # Rule 1: If it's in our high-confidence whitelist, it's a locality.
-    if word_normalized in LOCALITIES_WHITELIST:
-        return True
-
-    # Rule 2: If it's in our blacklist, it's definitely NOT a locality.
-    if word_normalized in NON_LOCALITIES_BLACKLIST:
-        return False
-
-    # Rule 3: Fallback rule. If it's capitalized and not blacklisted,
-    # assume it's a smaller village or locality we don't have on our lists.
-    if word_normalized[0].isupper():
-        return True
-
-    return False
+    return get_default_classifier().is_a_locality(word)
 
 # --- How to use it ---
 if __name__ == "__main__":
-    input_filename = 'data.csv'
-    output_filename = 'data2.csv'
+    parser = argparse.ArgumentParser(description="Keep only the rows whose word is a locality.")
+    parser.add_argument('--input', default='data.csv')
+    parser.add_argument('--output', default='data2.csv')
+    add_arguments(parser)
+    args = parser.parse_args()
+    input_filename = args.input
+    output_filename = args.output
 
     try:
-        print(f"Reading data from '{input_filename}'...")
-        # Use utf-8 encoding to handle Romanian diacritics correctly
-        df = pd.read_csv(input_filename, encoding='utf-8')
-
-        # Apply the filtering function to the 'cuvant' column
-        # This creates a boolean Series (True/False for each row)
-        is_locality_mask = df['cuvant'].apply(is_a_locality)
-
-        # Use the boolean mask to select only the rows where the mask is True
-        filtered_df = df[is_locality_mask]
-
-        # Save the filtered DataFrame to a new CSV file
-        # Use encoding='utf-8-sig' to ensure Excel and other programs read diacritics correctly
-        # index=False prevents pandas from writing a new index column
-        filtered_df.to_csv(output_filename, index=False, encoding='utf-8-sig')
-
-        print("-" * 30)
-        print(f"Filtering complete!")
-        print(f"Original number of rows: {len(df)}")
-        print(f"Number of rows after filtering: {len(filtered_df)}")
-        print(f"Filtered data has been saved to '{output_filename}'")
-        print("-" * 30)
+        with instrumented_run('filter_localities', args):
+            print(f"Reading data from '{input_filename}'...")
+            # Use utf-8 encoding to handle Romanian diacritics correctly
+            with timer('read_csv'):
+                df = pd.read_csv(input_filename, encoding='utf-8')
+            count('bytes_read', os.path.getsize(input_filename))
+            count('rows_in', len(df))
+
+            # Classify the whole 'cuvant' column in one vectorized pass
+            # This creates a boolean Series (True/False for each row)
+            with timer('classify'):
+                is_locality_mask = get_default_classifier().mask(df['cuvant'])
+
+            # Use the boolean mask to select only the rows where the mask is True
+            filtered_df = df[is_locality_mask]
+            count('rows_out', len(filtered_df))
+
+            # Save the filtered DataFrame to a new CSV file
+            # Use encoding='utf-8-sig' to ensure Excel and other programs read diacritics correctly
+            # index=False prevents pandas from writing a new index column
+            with timer('write_csv'):
+                filtered_df.to_csv(output_filename, index=False, encoding='utf-8-sig')
+
+            print("-" * 30)
+            print(f"Filtering complete!")
+            print(f"Original number of rows: {len(df)}")
+            print(f"Number of rows after filtering: {len(filtered_df)}")
+            print(f"Filtered data has been saved to '{output_filename}'")
+            print("-" * 30)
 
     except FileNotFoundError:
         print(f"ERROR: The input file '{input_filename}' was not found.")
         print("Please make sure you have saved the data into this file in the same directory.")
     except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+        print(f"An error occurred: {e}")
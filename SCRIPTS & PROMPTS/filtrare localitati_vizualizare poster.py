@@ -1,9 +1,13 @@
+import argparse
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np  # Import numpy
 
+from instrumentation import add_arguments, count, instrumented_run, timer
+
 
-def plot_word_stats_colored_labels(csv_path: str, min_occurrences: int = 1):
+def plot_word_stats_colored_labels(csv_path: str, min_occurrences: int = 1, output_file: str = None):
     """
     Reads a CSV, processes stats, and generates a scatter plot where each unique
     point and its corresponding multi-line text label have a distinct color.
@@ -11,14 +15,19 @@ def plot_word_stats_colored_labels(csv_path: str, min_occurrences: int = 1):
     Args:
         csv_path (str): The path to the CSV file.
         min_occurrences (int): Minimum occurrences to be included.
+        output_file (str): If given, the plot is saved to this file instead of
+            being shown (works headless, e.g. with the Agg backend).
     """
     try:
-        df = pd.read_csv(csv_path)
+        with timer('read_csv'):
+            df = pd.read_csv(csv_path)
+        count('rows_in', len(df))
 
-        summary_df = df.groupby('cuvant').agg(
-            x_occurrences=('cuvant', 'size'),
-            y_sum_total=('total_aparitii', 'sum')
-        ).reset_index()
+        with timer('aggregate'):
+            summary_df = df.groupby('cuvant').agg(
+                x_occurrences=('cuvant', 'size'),
+                y_sum_total=('total_aparitii', 'sum')
+            ).reset_index()
 
         filtered_df = summary_df[summary_df['x_occurrences'] >= min_occurrences]
 
@@ -45,49 +54,54 @@ def plot_word_stats_colored_labels(csv_path: str, min_occurrences: int = 1):
         unique_coords_tuples = [tuple(row) for row in unique_points_df[['x_occurrences', 'y_sum_total']].to_numpy()]
         coord_to_color_map = dict(zip(unique_coords_tuples, colors))
 
-        # --- PLOTTING WITH COLORS ---
-
-        plt.figure(figsize=(12, 8))
-
-        # Plot the unique points, assigning a color to each one
-        # The `c` argument takes a list of colors corresponding to the points
-        plt.scatter(
-            unique_points_df['x_occurrences'],
-            unique_points_df['y_sum_total'],
-            c=colors,  # Apply the generated colors
-            alpha=0.9,
-            s=80,
-            zorder=5
-        )
-
-        # Group words by coordinates to create labels
-        grouped_by_coords = filtered_df.groupby(['x_occurrences', 'y_sum_total'])
-
-        for (x_coord, y_coord), group_df in grouped_by_coords:
-            label_text = "\n".join(group_df['cuvant'])
-
-            # Look up the color for the current coordinate from our map
-            point_color = coord_to_color_map[(x_coord, y_coord)]
-
-            # Place the text, using the same color as the point
-            plt.text(
-                x=x_coord + 0.05,
-                y=y_coord,
-                s=label_text,
-                fontsize=9,
-                verticalalignment='center',
-                color=point_color,  # Apply the color to the text
-                fontweight='bold'  # Make text bold for better visibility
+        with timer('plot'):
+            # --- PLOTTING WITH COLORS ---
+
+            plt.figure(figsize=(12, 8))
+
+            # Plot the unique points, assigning a color to each one
+            # The `c` argument takes a list of colors corresponding to the points
+            plt.scatter(
+                unique_points_df['x_occurrences'],
+                unique_points_df['y_sum_total'],
+                c=colors,  # Apply the generated colors
+                alpha=0.9,
+                s=80,
+                zorder=5
             )
 
-        # --- END OF NEW LOGIC ---
+            # Group words by coordinates to create labels (one joined label per point)
+            labels_by_coords = filtered_df.groupby(['x_occurrences', 'y_sum_total'])['cuvant'].agg("\n".join)
+
+            for (x_coord, y_coord), label_text in labels_by_coords.items():
+                # Look up the color for the current coordinate from our map
+                point_color = coord_to_color_map[(x_coord, y_coord)]
+
+                # Place the text, using the same color as the point
+                plt.text(
+                    x=x_coord + 0.05,
+                    y=y_coord,
+                    s=label_text,
+                    fontsize=9,
+                    verticalalignment='center',
+                    color=point_color,  # Apply the color to the text
+                    fontweight='bold'  # Make text bold for better visibility
+                )
+
+            # --- END OF NEW LOGIC ---
 
         plt.title('Word Frequency vs. Total Appearances Sum (Colored Labels)')
         plt.xlabel('Number of Occurrences (in different files)')
         plt.ylabel('Sum of "total_aparitii"')
         plt.grid(True, linestyle='--', alpha=0.6)
         plt.subplots_adjust(right=0.85)
-        plt.show()
+        count('points_plotted', num_unique_points)
+        if output_file:
+            with timer('save'):
+                plt.savefig(output_file, dpi=200, bbox_inches='tight')
+            plt.close()
+        else:
+            plt.show()
 
     except FileNotFoundError:
         print(f"Error: The file '{csv_path}' was not found.")
@@ -99,7 +113,15 @@ def plot_word_stats_colored_labels(csv_path: str, min_occurrences: int = 1):
 if __name__ == "__main__":
     # Use the 'data_duplicates.csv' to see the grouping effect
     # You can download it from: https://pastebin.com/raw/50fQGZpD
+    parser = argparse.ArgumentParser(description="Plot word frequency vs. total appearances.")
+    parser.add_argument('csv_path', nargs='?', default='data2.csv')
+    parser.add_argument('--min-occurrences', type=int, default=5)
+    parser.add_argument('--output', help="Save the plot to this file instead of showing it")
+    add_arguments(parser)
+    args = parser.parse_args()
+
     print("--- Plotting words with colored, grouped labels ---")
-    plot_word_stats_colored_labels('data2.csv', min_occurrences=5)
+    with instrumented_run('poster_plot', args):
+        plot_word_stats_colored_labels(args.csv_path, min_occurrences=args.min_occurrences, output_file=args.output)
 
 
@@ -0,0 +1,161 @@
+import argparse
+import functools
+import unicodedata
+from collections import Counter
+
+import pandas as pd
+
+from extract_occurrences import CEDILLA_TO_COMMA
+from spatial_index import read_layer
+
+
+GAZETTEER_FILE = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA/1_LISTA DARIAH GEOBROWSER PROJECT_romane haiducesti Romania.csv"
+OCCURRENCES_FILE = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA/3_GIS toponyms_cities_FILTRATE_data2.csv"
+
+TIER_EXACT = 'exact'
+TIER_NORMALIZED = 'normalized'
+TIER_FUZZY = 'fuzzy'
+
+# 'â' and 'î' write the same sound; older texts use 'î' where the gazetteer has 'â'
+A_CIRCUMFLEX_TO_I = str.maketrans({'â': 'î', 'Â': 'Î'})
+
+
+def normalize_name(name: str) -> str:
+    """Folds ş/ș, ţ/ț, â/î, case and repeated spaces or hyphens (e.g. 'Ada-Kale' ~ 'Ada Kale')."""
+    name = name.translate(CEDILLA_TO_COMMA).translate(A_CIRCUMFLEX_TO_I).casefold()
+    return ' '.join(name.replace('-', ' ').split())
+
+
+def strip_diacritics(name: str) -> str:
+    """Removes every diacritic; used only for the fuzzy (trigram) tier."""
+    return ''.join(c for c in unicodedata.normalize('NFD', name) if not unicodedata.combining(c))
+
+
+def trigrams(name: str) -> set:
+    """Character trigrams of a name, padded so that the first and last letters count too."""
+    padded = f"  {strip_diacritics(normalize_name(name))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """
+    In-memory gazetteer with three lookup tiers: exact name, normalized name,
+    and trigram similarity. The trigram tier goes through an inverted index,
+    so only the names that share trigrams with the query are scored.
+    """
+
+    def __init__(self, places: pd.DataFrame, min_score: float = 0.7, cache_size: int = 65536):
+        self.places = places[['Name', 'Longitude', 'Latitude']].reset_index(drop=True)
+        self.min_score = min_score
+        names = self.places['Name'].astype(str).tolist()
+
+        # The first place wins when a name occurs twice
+        self.exact = {}
+        self.normalized = {}
+        self.postings = {}
+        self.trigram_counts = []
+        for place_id, name in enumerate(names):
+            self.exact.setdefault(name, place_id)
+            self.normalized.setdefault(normalize_name(name), place_id)
+            grams = trigrams(name)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(place_id)
+
+        self.resolve = functools.lru_cache(maxsize=cache_size)(self._resolve)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'Gazetteer':
+        return cls(read_layer(path), **kwargs)
+
+    def candidates(self, name: str, limit: int = 5) -> list:
+        """
+        Fuzzy candidates for a name, scored with the Dice coefficient of their trigrams.
+
+        Returns:
+            list: (place id, score) pairs, best first.
+        """
+        grams = trigrams(name)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        scored = [
+            (place_id, 2 * count / (len(grams) + self.trigram_counts[place_id]))
+            for place_id, count in shared.items()
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def _resolve(self, name: str):
+        """
+        Resolves one name (cached).
+
+        Returns:
+            tuple: (place id, tier, score), or None if nothing scores above min_score.
+        """
+        if name in self.exact:
+            return self.exact[name], TIER_EXACT, 1.0
+        place_id = self.normalized.get(normalize_name(name))
+        if place_id is not None:
+            return place_id, TIER_NORMALIZED, 1.0
+        best = self.candidates(name, limit=1)
+        if best and best[0][1] >= self.min_score:
+            return best[0][0], TIER_FUZZY, best[0][1]
+        return None
+
+    def geocode(self, names) -> pd.DataFrame:
+        """
+        Resolves a whole column of names; each distinct name is looked up once.
+
+        Returns:
+            pd.DataFrame: Columns matched_name, Longitude, Latitude, match_tier, match_score,
+            aligned with the input (empty where nothing matched).
+        """
+        names = pd.Series(names)
+        unique_names = names.dropna().astype(str).unique()
+        resolved = {name: self.resolve(name) for name in unique_names}
+
+        rows = []
+        for name in unique_names:
+            match = resolved[name]
+            if match is None:
+                continue
+            place_id, tier, score = match
+            place = self.places.iloc[place_id]
+            rows.append((name, place['Name'], place['Longitude'], place['Latitude'], tier, score))
+        lookup = pd.DataFrame(rows, columns=['query', 'matched_name', 'Longitude', 'Latitude',
+                                             'match_tier', 'match_score']).set_index('query')
+        return lookup.reindex(names.astype(str).where(names.notna())).set_axis(names.index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Join an occurrence table to gazetteer coordinates.")
+    parser.add_argument('--gazetteer', default=GAZETTEER_FILE)
+    parser.add_argument('--occurrences', default=OCCURRENCES_FILE)
+    parser.add_argument('--column', default='cuvant')
+    parser.add_argument('--min-score', type=float, default=0.7)
+    parser.add_argument('--output', default='data2_geocoded.csv')
+    args = parser.parse_args()
+
+    try:
+        gazetteer = Gazetteer.from_file(args.gazetteer, min_score=args.min_score)
+        df = pd.read_csv(args.occurrences, encoding='utf-8-sig')
+        geocoded = pd.concat([df, gazetteer.geocode(df[args.column])], axis=1)
+        geocoded.to_csv(args.output, index=False, encoding='utf-8-sig')
+
+        tiers = geocoded['match_tier'].fillna('unresolved').value_counts()
+        print("-" * 30)
+        print(f"Geocoding complete!")
+        print(f"Rows: {len(df)}, distinct names: {df[args.column].nunique()}")
+        for tier, count in tiers.items():
+            print(f"  {tier}: {count}")
+        print(f"Geocoded data has been saved to '{args.output}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
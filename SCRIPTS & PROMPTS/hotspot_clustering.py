@@ -0,0 +1,179 @@
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from spatial_index import SpatialIndex, km_to_chord, read_layer
+
+
+NOISE = -1
+
+
+def load_layers(layer_files: dict, weights: dict = None) -> pd.DataFrame:
+    """
+    Stacks several point layers into one table.
+
+    Args:
+        layer_files (dict): Layer name -> CSV/XLSX path.
+        weights (dict): Layer name -> weight of its points (default 1.0).
+
+    Returns:
+        pd.DataFrame: Columns layer, Name, Longitude, Latitude, weight.
+    """
+    weights = weights or {}
+    frames = []
+    for layer_name, path in layer_files.items():
+        df = read_layer(path)
+        frames.append(pd.DataFrame({
+            'layer': layer_name,
+            'Name': df['Name'] if 'Name' in df else '',
+            'Longitude': df['Longitude'],
+            'Latitude': df['Latitude'],
+            'weight': float(weights.get(layer_name, 1.0)),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def weighted_dbscan(lon, lat, weights, eps_km: float, min_weight: float) -> np.ndarray:
+    """
+    DBSCAN with haversine distance and per-point weights.
+
+    A point is a core point when the total weight of the points within eps_km
+    (itself included) reaches min_weight. Neighbour pairs come from the KD-tree
+    in one call, so no n x n distance matrix is ever built.
+
+    Returns:
+        np.ndarray: Cluster id of every point, NOISE (-1) for noise.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    n = len(weights)
+    index = SpatialIndex(lon, lat)
+    pairs = index.tree.query_pairs(km_to_chord(eps_km), output_type='ndarray')
+    i, j = pairs[:, 0], pairs[:, 1]
+
+    neighbourhood_weight = weights.copy()
+    neighbourhood_weight += np.bincount(i, weights=weights[j], minlength=n)
+    neighbourhood_weight += np.bincount(j, weights=weights[i], minlength=n)
+    core = neighbourhood_weight >= min_weight
+
+    # Clusters are the connected components of the core-core neighbour graph
+    core_edges = core[i] & core[j]
+    graph = coo_matrix((np.ones(core_edges.sum()), (i[core_edges], j[core_edges])), shape=(n, n))
+    _, components = connected_components(graph, directed=False)
+
+    labels = np.full(n, NOISE, dtype=np.int64)
+    core_ids = np.flatnonzero(core)
+    # Renumber the components that contain core points as 0, 1, 2, ...
+    _, labels[core_ids] = np.unique(components[core_ids], return_inverse=True)
+
+    # Border points join the cluster of (one of) their core neighbours
+    for a, b in ((i, j), (j, i)):
+        border = core[a] & ~core[b]
+        labels[b[border]] = labels[a[border]]
+    return labels
+
+
+def hub_centroids(points: pd.DataFrame, labels: np.ndarray) -> pd.DataFrame:
+    """
+    Weighted centroid (on the sphere), total weight and per-layer counts of every cluster.
+    """
+    clustered = points.assign(cluster=labels)
+    clustered = clustered[clustered['cluster'] != NOISE]
+    if clustered.empty:
+        return pd.DataFrame(columns=['cluster', 'Longitude', 'Latitude', 'n_points', 'total_weight'])
+
+    lon = np.radians(clustered['Longitude'].to_numpy())
+    lat = np.radians(clustered['Latitude'].to_numpy())
+    w = clustered['weight'].to_numpy()
+    xyz = pd.DataFrame({
+        'cluster': clustered['cluster'].to_numpy(),
+        'x': w * np.cos(lat) * np.cos(lon),
+        'y': w * np.cos(lat) * np.sin(lon),
+        'z': w * np.sin(lat),
+        'weight': w,
+    }).groupby('cluster').sum()
+
+    hubs = pd.DataFrame({
+        'cluster': xyz.index.to_numpy(),
+        'Longitude': np.degrees(np.arctan2(xyz['y'], xyz['x'])).to_numpy(),
+        'Latitude': np.degrees(np.arctan2(xyz['z'], np.hypot(xyz['x'], xyz['y']))).to_numpy(),
+        'n_points': clustered.groupby('cluster').size().to_numpy(),
+        'total_weight': xyz['weight'].to_numpy(),
+    })
+    per_layer = pd.crosstab(clustered['cluster'], clustered['layer'])
+    return hubs.merge(per_layer, left_on='cluster', right_index=True).sort_values('total_weight', ascending=False)
+
+
+def save_geojson(df: pd.DataFrame, output_file: str):
+    """Writes a table with Longitude / Latitude columns as a GeoJSON point collection."""
+    properties = df.drop(columns=['Longitude', 'Latitude'])
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [float(lon), float(lat)]},
+            'properties': {k: (v.item() if hasattr(v, 'item') else v) for k, v in props.items()},
+        }
+        for lon, lat, props in zip(df['Longitude'], df['Latitude'], properties.to_dict('records'))
+    ]
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f, ensure_ascii=False)
+
+
+def save_table(df: pd.DataFrame, output_file: str):
+    if output_file.lower().endswith(('.geojson', '.json')):
+        save_geojson(df, output_file)
+    else:
+        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+
+
+def parse_layer_argument(value: str):
+    """'Name=path.csv' or 'Name=path.csv:2.5' -> ('Name', 'path.csv', weight)"""
+    name, sep, rest = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Layer must be given as NAME=PATH[:WEIGHT], got '{value}'")
+    path, weight = rest, 1.0
+    head, colon, tail = rest.rpartition(':')
+    if colon:
+        try:
+            path, weight = head, float(tail)
+        except ValueError:
+            pass
+    return name.strip(), path.strip(), weight
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster the combined GIS layers into criminality hubs.")
+    parser.add_argument('--layer', action='append', type=parse_layer_argument, required=True,
+                        help="Layer as NAME=PATH[:WEIGHT]. Can be repeated.")
+    parser.add_argument('--eps', type=float, default=10.0, help="Neighbourhood radius in km")
+    parser.add_argument('--min-weight', type=float, default=5.0, help="Weight needed for a core point")
+    parser.add_argument('--points-output', default='hotspot_points.csv')
+    parser.add_argument('--hubs-output', default='hotspot_hubs.geojson')
+    args = parser.parse_args()
+
+    try:
+        layer_files = {name: path for name, path, _ in args.layer}
+        weights = {name: weight for name, _, weight in args.layer}
+        points = load_layers(layer_files, weights)
+        labels = weighted_dbscan(points['Longitude'], points['Latitude'], points['weight'], args.eps, args.min_weight)
+        hubs = hub_centroids(points, labels)
+
+        save_table(points.assign(cluster=labels), args.points_output)
+        save_table(hubs, args.hubs_output)
+
+        print("-" * 30)
+        print(f"Clustering complete!")
+        print(f"Points: {len(points)}, hubs: {len(hubs)}, noise points: {(labels == NOISE).sum()}")
+        print(f"Points saved to '{args.points_output}', hubs saved to '{args.hubs_output}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
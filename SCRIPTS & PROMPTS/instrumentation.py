@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+# Interval of the sampling profiler behind --profile folded
+SAMPLE_INTERVAL_S = 0.005
+PROFILE_MODES = ('cprofile', 'folded')
+
+
+class Run:
+    """
+    Timers and counters of one script run.
+
+    Stages are timed with the timer() context manager or the timed() decorator;
+    nested stages are reported as 'outer/inner'. Counters (rows in/out, bytes
+    read, pages parsed, cache hits ...) are added with count(). When
+    track_memory is set, tracemalloc also records the peak memory of each stage.
+    """
+
+    def __init__(self, name: str, track_memory: bool = False):
+        self.name = name
+        self.track_memory = track_memory
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.counters = Counter()
+        self.spans = []
+        self._stack = []
+        self._lock = threading.Lock()
+        # Only stopped at the end when this run started it
+        self.started_tracing = track_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        path = '/'.join([frame['name'] for frame in self._stack] + [name])
+        frame = {'name': name, 'child_peak': 0}
+        if self.track_memory:
+            # The peak so far belongs to the enclosing stage, then the counter restarts for this one
+            if self._stack:
+                parent = self._stack[-1]
+                parent['child_peak'] = max(parent['child_peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            peak = None
+            if self.track_memory:
+                peak = max(frame['child_peak'], tracemalloc.get_traced_memory()[1])
+                if self._stack:
+                    self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], peak)
+            with self._lock:
+                stage = self.stages.setdefault(path, {'calls': 0, 'total_s': 0.0})
+                stage['calls'] += 1
+                stage['total_s'] += elapsed
+                if peak is not None:
+                    stage['peak_mb'] = max(stage.get('peak_mb', 0.0), peak / 1e6)
+                self.spans.append((path, start - self._start, elapsed))
+
+    def timed(self, name: str = None):
+        """Decorator version of timer(); the stage name defaults to the function name."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def report(self) -> dict:
+        """The run report: total time, stages, counters and (optionally) peak memory."""
+        report = {
+            'name': self.name,
+            'argv': sys.argv,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'duration_s': time.perf_counter() - self._start,
+            'stages': {path: dict(stage) for path, stage in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+        if self.track_memory and tracemalloc.is_tracing():
+            report['peak_memory_mb'] = max(
+                [tracemalloc.get_traced_memory()[1] / 1e6] + [s.get('peak_mb', 0.0) for s in self.stages.values()])
+        return report
+
+    def save_report(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def save_trace(self, path: str):
+        """Writes the timed stages in the Chrome trace format (chrome://tracing, Perfetto, speedscope)."""
+        events = [{'name': path_name.rsplit('/', 1)[-1], 'cat': path_name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                   'ts': start * 1e6, 'dur': elapsed * 1e6} for path_name, start, elapsed in self.spans]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the main thread's Python stack at a fixed interval and counts the
+    stacks in the folded format ('module:function;module:function count'),
+    which flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = Counter()
+        self._target = threading.main_thread().ident
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+# --- Module-level run: the scripts use these helpers directly ---
+# Only set inside instrumented_run(); outside of it (library callers, benchmark.py,
+# pipeline.py) the helpers below do nothing, so nothing accumulates between calls
+_current = None
+
+
+def current_run() -> Run:
+    """The active run, or None outside instrumented_run()."""
+    return _current
+
+
+def timer(name: str):
+    return _current.timer(name) if _current is not None else contextlib.nullcontext()
+
+
+def timed(name: str = None):
+    """Decorator timing a function in whichever run is current when it is called."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, n: int = 1):
+    if _current is not None:
+        _current.count(name, n)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Adds the shared --profile / --track-memory / --report / --trace options to a script's parser."""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--profile', choices=PROFILE_MODES,
+                       help="cprofile: dump pstats to <name>.prof; folded: sampled stacks to <name>.folded")
+    group.add_argument('--track-memory', action='store_true', help="Record peak memory per stage (tracemalloc)")
+    group.add_argument('--report', help="Write the JSON run report to this file")
+    group.add_argument('--trace', help="Write the timed stages as a Chrome trace to this file")
+
+
+@contextlib.contextmanager
+def instrumented_run(name: str, args: argparse.Namespace = None, profile: str = None, track_memory: bool = False,
+                     report: str = None, trace: str = None):
+    """
+    Starts a fresh run for a script's main() and, at the end, writes the requested
+    profile, report and trace. The stage timings are only printed when one of these
+    options is given, so a plain run prints what it always printed. The options can
+    come from the arguments added by add_arguments().
+    """
+    global _current
+    if args is not None:
+        profile = getattr(args, 'profile', profile)
+        track_memory = getattr(args, 'track_memory', track_memory)
+        report = getattr(args, 'report', report)
+        trace = getattr(args, 'trace', trace)
+
+    previous = _current
+    _current = run = Run(name, track_memory)
+    profiler = cProfile.Profile() if profile == 'cprofile' else None
+    sampler = StackSampler() if profile == 'folded' else None
+    if profiler:
+        profiler.enable()
+    if sampler:
+        sampler.start()
+    try:
+        with run.timer('total'):
+            yield run
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(f"{name}.prof")
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+            print(summary.getvalue())
+            print(f"Profile has been saved to '{name}.prof'")
+        if sampler:
+            sampler.stop()
+            sampler.save(f"{name}.folded")
+            print(f"Sampled stacks have been saved to '{name}.folded'")
+        if profile or track_memory or report or trace:
+            print_summary(run)
+        if report:
+            run.save_report(report)
+            print(f"Run report has been saved to '{report}'")
+        if trace:
+            run.save_trace(trace)
+            print(f"Trace has been saved to '{trace}'")
+        if run.started_tracing:
+            tracemalloc.stop()
+        _current = previous
+
+
+def print_summary(run: Run):
+    print("-" * 30)
+    print(f"Timings ({run.name}):")
+    for path, stage in run.stages.items():
+        memory = f", peak {stage['peak_mb']:.1f} MB" if 'peak_mb' in stage else ""
+        print(f"  {path}: {stage['total_s']:.3f} s ({stage['calls']} calls){memory}")
+    for counter, value in run.counters.items():
+        print(f"  {counter}: {value}")
+    print("-" * 30)
@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from spatial_index import clean_coordinates, read_sheets
+
+
+STORE_DIR = "layer_store"
+DATABASE_FILE = "layers.sqlite"
+HAJDUK_DIR = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA"
+SHEET_SEPARATOR = " / "
+
+# Layer name -> source file. Files with Longitude/Latitude become point layers,
+# the others (word counts, buffer values) are stored as plain tables. Every sheet
+# of a multi-sheet workbook becomes its own layer, named '<layer> / <sheet>'.
+DEFAULT_SOURCES = {
+    'Hajduk novels': f"{HAJDUK_DIR}/1_LISTA DARIAH GEOBROWSER PROJECT_romane haiducesti Romania.csv",
+    'Forests Oltenia': "Transfer_Word_to_CSV/paduri_oltenia.csv",
+    'Forests CoordinatesYX': "CoordinatesYX _forests_version/my_csv.csv",
+    'Word counts': f"{HAJDUK_DIR}/4_WordCounts_Hai_RO.xlsx",
+    'Buffer values': "../Buffer values for literary hajduk cities.xlsx",
+}
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def table_name(layer: str) -> str:
+    """SQL table name used for a non-point source."""
+    return 'table_' + ''.join(c if c.isalnum() else '_' for c in layer.lower())
+
+
+class LayerStore:
+    """
+    One typed store for all GIS layers.
+
+    Points of every layer live in a single SQLite table with an R-tree index
+    (layer, name, address and provenance columns), and their coordinates are
+    also written as float64 .npy arrays that are memory-mapped on load.
+    """
+
+    def __init__(self, store_dir: str = STORE_DIR):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(store_dir, DATABASE_FILE))
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                layer TEXT PRIMARY KEY, path TEXT NOT NULL, sha256 TEXT NOT NULL,
+                kind TEXT NOT NULL, rows INTEGER NOT NULL, ingested_at TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS points (
+                id INTEGER PRIMARY KEY, layer TEXT NOT NULL, name TEXT, address TEXT,
+                source TEXT NOT NULL, source_row INTEGER NOT NULL,
+                lon REAL NOT NULL, lat REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS points_layer ON points (layer);
+            CREATE VIRTUAL TABLE IF NOT EXISTS points_rtree USING rtree (id, min_lon, max_lon, min_lat, max_lat);
+        """)
+        self._arrays = None
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Ingest ---
+
+    def ingest(self, sources: dict) -> dict:
+        """
+        Normalizes the given sources into the store. A source whose file hash
+        is unchanged since the last ingest is not parsed again.
+
+        Returns:
+            dict: layer (or '<layer> / <sheet>') -> 'unchanged', 'points' or 'table'.
+        """
+        known = {layer: sha for layer, sha in self.connection.execute("SELECT layer, sha256 FROM sources")}
+        report = {}
+        with self.connection:
+            for layer, path in sources.items():
+                sha = file_hash(path)
+                stored = [name for name in known if name == layer or name.startswith(layer + SHEET_SEPARATOR)]
+                if stored and all(known[name] == sha for name in stored):
+                    report[layer] = 'unchanged'
+                    continue
+                for name in stored:
+                    self._drop_layer(name)
+                sheets = read_sheets(path)
+                for sheet, df in sheets.items():
+                    name = layer if len(sheets) == 1 else f"{layer}{SHEET_SEPARATOR}{sheet}"
+                    if {'Longitude', 'Latitude'} <= set(df.columns):
+                        # Row numbers of the sheet, taken before cleaning drops rows and renumbers them
+                        df = df.assign(_source_row=np.arange(len(df)))
+                        kind, rows = 'points', self._insert_points(name, path, clean_coordinates(df, path))
+                    else:
+                        kind, rows = 'table', len(df)
+                        df.to_sql(table_name(name), self.connection, if_exists='replace', index=False)
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                        (name, path, sha, kind, rows, datetime.now(timezone.utc).isoformat()))
+                    report[name] = kind
+        if any(kind != 'unchanged' for kind in report.values()):
+            self._write_arrays()
+        return report
+
+    def _drop_layer(self, layer: str):
+        row = self.connection.execute("SELECT kind FROM sources WHERE layer = ?", (layer,)).fetchone()
+        if row and row[0] == 'table':
+            self.connection.execute(f'DROP TABLE IF EXISTS "{table_name(layer)}"')
+        self.connection.execute(
+            "DELETE FROM points_rtree WHERE id IN (SELECT id FROM points WHERE layer = ?)", (layer,))
+        self.connection.execute("DELETE FROM points WHERE layer = ?", (layer,))
+        self.connection.execute("DELETE FROM sources WHERE layer = ?", (layer,))
+
+    def _insert_points(self, layer: str, path: str, df: pd.DataFrame) -> int:
+        names = df['Name'] if 'Name' in df else pd.Series([None] * len(df))
+        addresses = df['Address'] if 'Address' in df else pd.Series([None] * len(df))
+        rows = [
+            (layer, None if pd.isna(name) else str(name), None if pd.isna(address) else str(address),
+             path, int(source_row), float(lon), float(lat))
+            for source_row, name, address, lon, lat
+            in zip(df['_source_row'], names, addresses, df['Longitude'], df['Latitude'])
+        ]
+        self.connection.executemany(
+            "INSERT INTO points (layer, name, address, source, source_row, lon, lat) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows)
+        self.connection.execute(
+            "INSERT INTO points_rtree SELECT id, lon, lon, lat, lat FROM points WHERE layer = ?", (layer,))
+        return len(rows)
+
+    def _write_arrays(self):
+        """Dumps ids, layer codes and coordinates (ordered by id) as .npy files."""
+        points = pd.read_sql("SELECT id, layer, lon, lat FROM points ORDER BY id", self.connection)
+        layers = sorted(points['layer'].unique())
+        codes = pd.Categorical(points['layer'], categories=layers).codes.astype(np.int32)
+        np.save(os.path.join(self.store_dir, 'id.npy'), points['id'].to_numpy(np.int64))
+        np.save(os.path.join(self.store_dir, 'layer.npy'), codes)
+        np.save(os.path.join(self.store_dir, 'lon.npy'), points['lon'].to_numpy(np.float64))
+        np.save(os.path.join(self.store_dir, 'lat.npy'), points['lat'].to_numpy(np.float64))
+        with open(os.path.join(self.store_dir, 'layers.txt'), 'w', encoding='utf-8') as f:
+            f.writelines(layer + '\n' for layer in layers)
+        self._arrays = None
+
+    # --- Loading ---
+
+    def layers(self) -> list:
+        """Names of the point layers, in the order of the layer codes."""
+        with open(os.path.join(self.store_dir, 'layers.txt'), encoding='utf-8') as f:
+            return [line.rstrip('\n') for line in f if line.strip()]
+
+    def arrays(self, layer: str = None) -> dict:
+        """
+        Coordinates as NumPy arrays: keys 'id', 'layer', 'lon', 'lat'.
+        Without a layer the arrays are memory-mapped (no copy); with a layer
+        they are the subset of that layer.
+        """
+        if self._arrays is None:
+            self._arrays = {
+                key: np.load(os.path.join(self.store_dir, f'{key}.npy'), mmap_mode='r')
+                for key in ('id', 'layer', 'lon', 'lat')
+            }
+        if layer is None:
+            return self._arrays
+        mask = self._arrays['layer'] == self.layers().index(layer)
+        return {key: values[mask] for key, values in self._arrays.items()}
+
+    def points(self, layer: str = None) -> pd.DataFrame:
+        """Points of one layer (or of all layers) as a DataFrame."""
+        query = "SELECT id, layer, name, address, source, source_row, lon, lat FROM points"
+        if layer is None:
+            return pd.read_sql(query + " ORDER BY id", self.connection)
+        return pd.read_sql(query + " WHERE layer = ? ORDER BY id", self.connection, params=(layer,))
+
+    def bbox(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float, layers=None) -> pd.DataFrame:
+        """Points inside a bounding box, found through the R-tree index."""
+        query = (
+            "SELECT p.id, p.layer, p.name, p.address, p.source, p.source_row, p.lon, p.lat "
+            "FROM points_rtree r JOIN points p ON p.id = r.id "
+            "WHERE r.min_lon >= ? AND r.max_lon <= ? AND r.min_lat >= ? AND r.max_lat <= ?")
+        params = [min_lon, max_lon, min_lat, max_lat]
+        if layers:
+            query += f" AND p.layer IN ({', '.join('?' * len(layers))})"
+            params += list(layers)
+        return pd.read_sql(query + " ORDER BY p.id", self.connection, params=params)
+
+    def table(self, layer: str) -> pd.DataFrame:
+        """A non-point source (e.g. the word counts) as a DataFrame."""
+        return pd.read_sql(f'SELECT * FROM "{table_name(layer)}"', self.connection)
+
+    def sources(self) -> pd.DataFrame:
+        """Provenance of every ingested layer."""
+        return pd.read_sql("SELECT * FROM sources ORDER BY layer", self.connection)
+
+
+def parse_source_argument(value: str):
+    """'Name=path.csv' -> ('Name', 'path.csv')"""
+    name, sep, path = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Source must be given as NAME=PATH, got '{value}'")
+    return name.strip(), path.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest the GIS layers into one columnar store.")
+    parser.add_argument('--source', action='append', type=parse_source_argument,
+                        help="Source to ingest, as NAME=PATH (CSV or XLSX). Can be repeated.")
+    parser.add_argument('--store', default=STORE_DIR)
+    args = parser.parse_args()
+
+    sources = dict(args.source) if args.source else DEFAULT_SOURCES
+
+    try:
+        with LayerStore(args.store) as store:
+            report = store.ingest(sources)
+            print("-" * 30)
+            print(f"Ingest complete!")
+            for layer, kind in report.items():
+                print(f"  {layer}: {kind}")
+            print(store.sources()[['layer', 'kind', 'rows']].to_string(index=False))
+            print(f"Store saved to '{args.store}'")
+            print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import functools
+import json
+import os
+import tempfile
+from multiprocessing import Pool
+
+import matplotlib
+matplotlib.use('Agg')  # headless: no window, no QGIS session
+import matplotlib.image as mpimg
+import matplotlib.pyplot as plt
+import numpy as np
+
+from spatial_index import read_layer
+
+
+DEFAULT_STYLE = {'color': 'tab:red', 'marker': 'o', 'size': 12, 'alpha': 0.8}
+
+
+def load_specs(path: str) -> dict:
+    """
+    Reads a declarative map spec file (JSON):
+
+        {
+          "basemap": {"path": "harta_1817.png", "extent": [min_lon, max_lon, min_lat, max_lat]},
+          "defaults": {"dpi": 200, "figsize": [12, 9], "output_dir": "maps"},
+          "maps": [
+            {"name": "12R low factuality RO", "extent": [...],
+             "layers": [{"source": "layer.csv", "label": "Hajduk novels", "color": "red", "labels": true}]}
+          ]
+        }
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    # Paths inside the spec are relative to the spec file
+    if specs.get('basemap'):
+        specs['basemap']['path'] = os.path.join(base_dir, specs['basemap']['path'])
+    for map_spec in specs['maps']:
+        for layer in map_spec.get('layers', []):
+            layer['source'] = os.path.join(base_dir, layer['source'])
+    return specs
+
+
+def cache_basemap(basemap_path: str, cache_dir: str) -> str:
+    """
+    Decodes the base map raster once and saves it as a .npy file, so that every
+    worker can memory-map it instead of decoding the image again.
+    """
+    cache_file = os.path.join(cache_dir, 'basemap.npy')
+    np.save(cache_file, mpimg.imread(basemap_path))
+    return cache_file
+
+
+# --- Worker side: the base map is memory-mapped once per process ---
+_worker_basemap = None
+
+
+def _init_worker(basemap_cache):
+    global _worker_basemap
+    if basemap_cache:
+        _worker_basemap = np.load(basemap_cache, mmap_mode='r')
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_layer(path: str):
+    # The same layer file appears in many maps; parse it once per process
+    return read_layer(path)
+
+
+def render_map(map_spec: dict, basemap_extent=None, defaults: dict = None) -> str:
+    """
+    Renders one map spec to an image file and returns its path.
+    """
+    defaults = defaults or {}
+    output_dir = map_spec.get('output_dir', defaults.get('output_dir', 'maps'))
+    output_file = os.path.join(output_dir, map_spec.get('output', f"{map_spec['name']}.png"))
+    os.makedirs(output_dir, exist_ok=True)
+
+    fig, ax = plt.subplots(figsize=map_spec.get('figsize', defaults.get('figsize', (12, 9))))
+    try:
+        if _worker_basemap is not None and map_spec.get('basemap', True):
+            ax.imshow(_worker_basemap, extent=basemap_extent, origin='upper', zorder=0)
+
+        for order, layer in enumerate(map_spec.get('layers', []), start=1):
+            style = {**DEFAULT_STYLE, **layer}
+            df = _cached_layer(layer['source'])
+            ax.scatter(df['Longitude'].to_numpy(), df['Latitude'].to_numpy(),
+                       c=style['color'], marker=style['marker'], s=style['size'], alpha=style['alpha'],
+                       label=style.get('label'), edgecolors='none', zorder=order)
+            if layer.get('labels') and 'Name' in df:
+                for x, y, text in zip(df['Longitude'], df['Latitude'], df['Name'].astype(str)):
+                    ax.annotate(text, (x, y), xytext=(3, 3), textcoords='offset points',
+                                fontsize=style.get('fontsize', 6), color=style['color'], zorder=order)
+
+        extent = map_spec.get('extent') or basemap_extent
+        if extent:
+            ax.set_xlim(extent[0], extent[1])
+            ax.set_ylim(extent[2], extent[3])
+        ax.set_aspect(1 / np.cos(np.radians(np.mean(ax.get_ylim()))))
+        ax.set_title(map_spec.get('title', map_spec['name']))
+        ax.set_xlabel('Longitude')
+        ax.set_ylabel('Latitude')
+        if any(layer.get('label') for layer in map_spec.get('layers', [])):
+            ax.legend(loc=map_spec.get('legend', 'lower right'), fontsize=8)
+        fig.savefig(output_file, dpi=map_spec.get('dpi', defaults.get('dpi', 200)), bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return output_file
+
+
+def _render_task(task):
+    map_spec, basemap_extent, defaults = task
+    return render_map(map_spec, basemap_extent, defaults)
+
+
+def render_all(specs: dict, processes: int = None) -> list:
+    """
+    Renders every map of a spec file in parallel, sharing one decoded base map.
+
+    Returns:
+        list: The paths of the rendered images, in spec order.
+    """
+    basemap = specs.get('basemap')
+    defaults = specs.get('defaults', {})
+    with tempfile.TemporaryDirectory() as cache_dir:
+        basemap_cache = cache_basemap(basemap['path'], cache_dir) if basemap else None
+        basemap_extent = basemap['extent'] if basemap else None
+        tasks = [(map_spec, basemap_extent, defaults) for map_spec in specs['maps']]
+        with Pool(processes, initializer=_init_worker, initargs=(basemap_cache,)) as pool:
+            return pool.map(_render_task, tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the poster maps headless from a declarative spec.")
+    parser.add_argument('specs', nargs='?', default='map_specs.json')
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        specs = load_specs(args.specs)
+        outputs = render_all(specs, args.processes)
+
+        print("-" * 30)
+        print(f"Rendering complete!")
+        print(f"Number of maps rendered: {len(outputs)}")
+        for output in outputs:
+            print(f"  {output}")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
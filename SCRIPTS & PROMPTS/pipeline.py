@@ -0,0 +1,331 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from extract_occurrences import (CONTEXT_WINDOW, CORPUS_ZIP, GAZETTEER, iter_corpus_members, load_gazetteer,
+                                 occurrence_rows, save_occurrences, scan_members)
+from filter_localities import BLACKLIST_FILE, WHITELIST_FILE, LocalityClassifier
+from geocoder import Gazetteer
+from layer_store import file_hash
+from map_renderer import load_specs, render_all
+
+
+CACHE_PATH = "pipeline_cache.sqlite"
+# Stage outputs are written here, never over the committed data.csv / data2.csv
+BUILD_DIR = "build"
+
+
+class Stage:
+    """
+    One step of the pipeline. A stage is re-run only when the hash of its
+    parameters and input files changed, or when one of its outputs is missing
+    or was modified since the last run.
+
+    Args:
+        name (str): Stage name (also used on the command line).
+        func (callable): func(stage, cache_path), writes the output files.
+        inputs (list): Files read by the stage (outputs of other stages included).
+        outputs (list): Files written by the stage.
+        deps (list): Names of the stages that must run first.
+        params (dict): JSON-serializable parameters, part of the cache key.
+        options (dict): Run-time options that do not change the outputs (e.g. processes).
+        forks (bool): The stage starts worker processes (multiprocessing.Pool), so it
+            is run on the main thread, never next to the pipeline's worker threads.
+    """
+
+    def __init__(self, name: str, func, inputs=(), outputs=(), deps=(), params: dict = None, options: dict = None,
+                 forks: bool = False):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.params = params or {}
+        self.options = options or {}
+        self.forks = forks
+
+    def key(self) -> str:
+        payload = {
+            'stage': self.name,
+            'params': self.params,
+            'inputs': {path: file_hash(path) for path in self.inputs},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def connect(cache_path: str) -> sqlite3.Connection:
+    """Opens the pipeline cache (one connection per thread)."""
+    conn = sqlite3.connect(cache_path, timeout=60)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS stages (stage TEXT PRIMARY KEY, key TEXT, outputs TEXT, finished REAL);
+        CREATE TABLE IF NOT EXISTS novels (member TEXT PRIMARY KEY, member_key TEXT, file_name TEXT, found TEXT);
+        CREATE TABLE IF NOT EXISTS maps (name TEXT PRIMARY KEY, key TEXT, output TEXT);
+    """)
+    return conn
+
+
+def _replace_atomically(write, output_file: str):
+    """Writes through a temporary file, so an interrupted stage never leaves a half-written output."""
+    temporary = output_file + '.tmp'
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    write(temporary)
+    os.replace(temporary, output_file)
+
+
+# --- Stage implementations ---
+
+def run_extract(stage: Stage, cache_path: str):
+    """
+    Occurrence extraction, incremental per novel: a novel is rescanned only if its
+    zip entry (CRC, size) or the gazetteer changed; the others come from the cache.
+    """
+    corpus, gazetteer = stage.params['corpus'], stage.params['gazetteer']
+    toponyms = load_gazetteer(gazetteer)
+    gazetteer_key = f"{file_hash(gazetteer)}:{CONTEXT_WINDOW}"
+    with zipfile.ZipFile(corpus) as archive:
+        members = {name: f"{archive.getinfo(name).CRC}:{archive.getinfo(name).file_size}:{gazetteer_key}"
+                   for name in iter_corpus_members(corpus)}
+
+    conn = connect(cache_path)
+    try:
+        cached = {member: (member_key, file_name, found)
+                  for member, member_key, file_name, found in conn.execute("SELECT * FROM novels")}
+        changed = [m for m, k in members.items() if m not in cached or cached[m][0] != k]
+        print(f"  extract: {len(changed)} of {len(members)} novels to scan")
+        for member, file_name, found in scan_members(corpus, toponyms, changed, stage.options.get('processes')):
+            found_json = json.dumps(found, ensure_ascii=False)
+            conn.execute("INSERT OR REPLACE INTO novels VALUES (?, ?, ?, ?)",
+                         (member, members[member], file_name, found_json))
+            cached[member] = (members[member], file_name, found_json)
+        conn.executemany("DELETE FROM novels WHERE member = ?", [(m,) for m in cached if m not in members])
+        conn.commit()
+    finally:
+        conn.close()
+
+    rows = occurrence_rows((cached[m][1], json.loads(cached[m][2])) for m in members)
+    _replace_atomically(lambda path: save_occurrences(rows, path), stage.outputs[0])
+
+
+def run_filter(stage: Stage, cache_path: str):
+    """Occurrence table -> locality rows, as filter_localities.py does."""
+    df = pd.read_csv(stage.inputs[0], encoding='utf-8')
+    classifier = LocalityClassifier(stage.params['whitelist'], stage.params['blacklist'])
+    filtered_df = df[classifier.mask(df['cuvant'])]
+    _replace_atomically(lambda path: filtered_df.to_csv(path, index=False, encoding='utf-8-sig'), stage.outputs[0])
+
+
+def run_geocode(stage: Stage, cache_path: str):
+    """Locality rows -> rows with coordinates, as geocoder.py does."""
+    gazetteer = Gazetteer.from_file(stage.params['gazetteer'], min_score=stage.params['min_score'])
+    df = pd.read_csv(stage.inputs[0], encoding='utf-8-sig')
+    geocoded = pd.concat([df, gazetteer.geocode(df['cuvant'])], axis=1)
+    _replace_atomically(lambda path: geocoded.to_csv(path, index=False, encoding='utf-8-sig'), stage.outputs[0])
+
+
+def run_maps(stage: Stage, cache_path: str):
+    """
+    Renders the maps of the spec file, incremental per map: a map is rendered
+    again only if its spec, one of its layer files or the base map changed.
+    """
+    specs = load_specs(stage.params['specs'])
+    basemap = specs.get('basemap')
+    basemap_hash = file_hash(basemap['path']) if basemap else None
+    hashes = {}
+
+    def map_key(map_spec):
+        sources = [layer['source'] for layer in map_spec.get('layers', [])]
+        for source in sources:
+            if source not in hashes:
+                hashes[source] = file_hash(source)
+        payload = {'spec': map_spec, 'defaults': specs.get('defaults', {}), 'basemap': basemap,
+                   'basemap_hash': basemap_hash, 'sources': [hashes[s] for s in sources]}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    conn = connect(cache_path)
+    try:
+        done = {name: (key, output) for name, key, output in conn.execute("SELECT * FROM maps")}
+        keys = {map_spec['name']: map_key(map_spec) for map_spec in specs['maps']}
+        changed = [map_spec for map_spec in specs['maps']
+                   if done.get(map_spec['name'], (None, None))[0] != keys[map_spec['name']]
+                   or not os.path.exists(done[map_spec['name']][1])]
+        print(f"  maps: {len(changed)} of {len(specs['maps'])} maps to render")
+        if changed:
+            outputs = render_all({**specs, 'maps': changed}, stage.options.get('processes'))
+            conn.executemany("INSERT OR REPLACE INTO maps VALUES (?, ?, ?)",
+                             [(m['name'], keys[m['name']], out) for m, out in zip(changed, outputs)])
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def default_stages(processes: int = None, build_dir: str = BUILD_DIR) -> dict:
+    """
+    The project's workflow as a DAG, the tables being written to build_dir:
+
+        extract (corpus zip) -> data.csv -> filter -> data2.csv -> geocode -> data2_geocoded.csv
+        maps (map_specs.json and its layer files), independent of the text chain
+
+    The committed data.csv and data2.csv next to the scripts are reference
+    tables; the pipeline only writes over them when build_dir is explicitly set to '.'.
+    """
+    occurrences, localities, geocoded = (os.path.join(build_dir, name)
+                                         for name in ('data.csv', 'data2.csv', 'data2_geocoded.csv'))
+    specs_file = 'map_specs.json'
+    map_sources = []
+    if os.path.exists(specs_file):
+        specs = load_specs(specs_file)
+        map_sources = sorted({layer['source'] for m in specs['maps'] for layer in m.get('layers', [])})
+        if specs.get('basemap'):
+            map_sources.append(specs['basemap']['path'])
+
+    stages = [
+        Stage('extract', run_extract, inputs=[CORPUS_ZIP, GAZETTEER], outputs=[occurrences],
+              params={'corpus': CORPUS_ZIP, 'gazetteer': GAZETTEER, 'window': CONTEXT_WINDOW},
+              options={'processes': processes}, forks=True),
+        Stage('filter', run_filter, inputs=[occurrences, WHITELIST_FILE, BLACKLIST_FILE], outputs=[localities],
+              deps=['extract'], params={'whitelist': WHITELIST_FILE, 'blacklist': BLACKLIST_FILE}),
+        Stage('geocode', run_geocode, inputs=[localities, GAZETTEER], outputs=[geocoded],
+              deps=['filter'], params={'gazetteer': GAZETTEER, 'min_score': 0.7}),
+        Stage('maps', run_maps, inputs=[specs_file] + map_sources,
+              params={'specs': specs_file}, options={'processes': processes}, forks=True),
+    ]
+    return {stage.name: stage for stage in stages}
+
+
+class Pipeline:
+    """Runs a DAG of stages, skipping the up-to-date ones and running independent stages in parallel."""
+
+    def __init__(self, stages: dict, cache_path: str = CACHE_PATH):
+        self.stages = stages
+        self.cache_path = cache_path
+
+    def required(self, targets=None) -> list:
+        """The targets and all the stages they depend on, in a valid order."""
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for name in targets or self.stages:
+            visit(name)
+        return order
+
+    def is_up_to_date(self, stage: Stage, key: str) -> bool:
+        conn = connect(self.cache_path)
+        try:
+            row = conn.execute("SELECT key, outputs FROM stages WHERE stage = ?", (stage.name,)).fetchone()
+        finally:
+            conn.close()
+        if row is None or row[0] != key:
+            return False
+        outputs = json.loads(row[1])
+        return all(os.path.exists(path) and file_hash(path) == digest for path, digest in outputs.items())
+
+    def run_stage(self, stage: Stage, force: bool = False) -> str:
+        """Runs one stage if needed; returns 'cached' or the run time."""
+        key = stage.key()
+        if not force and self.is_up_to_date(stage, key):
+            return 'cached'
+        start = time.perf_counter()
+        stage.func(stage, self.cache_path)
+        outputs = {path: file_hash(path) for path in stage.outputs}
+        conn = connect(self.cache_path)
+        try:
+            conn.execute("INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?)",
+                         (stage.name, key, json.dumps(outputs), time.time()))
+            conn.commit()
+        finally:
+            conn.close()
+        return f"ran in {time.perf_counter() - start:.1f} s"
+
+    def ready(self, pending: list, status: dict) -> list:
+        """The pending stages whose dependencies are all done."""
+        return [name for name in pending if all(d in status for d in self.stages[name].deps)]
+
+    def run(self, targets=None, force: bool = False, jobs: int = 2) -> dict:
+        """
+        Runs the required stages; a stage starts as soon as all its dependencies are done.
+        Stages that fork worker processes run one at a time on the main thread, while no
+        worker thread exists (forking a threaded process can deadlock the children).
+
+        Returns:
+            dict: Stage name -> status.
+        """
+        pending = self.required(targets)
+        status = {}
+        while pending:
+            forking = [name for name in self.ready(pending, status) if self.stages[name].forks]
+            if not forking:
+                self._run_threaded(pending, status, force, jobs)
+                continue
+            for name in forking:
+                pending.remove(name)
+                status[name] = self.run_stage(self.stages[name], force)
+                print(f"{name}: {status[name]}")
+        return status
+
+    def _run_threaded(self, pending: list, status: dict, force: bool, jobs: int):
+        """Runs the stages that do not fork in worker threads, until only forking stages (or none) are ready."""
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            running = {}
+            while True:
+                for name in self.ready(pending, status):
+                    if not self.stages[name].forks:
+                        pending.remove(name)
+                        running[executor.submit(self.run_stage, self.stages[name], force)] = name
+                if not running:
+                    return
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    status[name] = future.result()
+                    print(f"{name}: {status[name]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the corpus -> filtered -> geocoded -> maps pipeline incrementally.")
+    parser.add_argument('targets', nargs='*', help="Stages to bring up to date (default: all)")
+    parser.add_argument('--force', action='store_true', help="Re-run the stages even if they are up to date")
+    parser.add_argument('--jobs', type=int, default=2, help="Stages run at the same time")
+    parser.add_argument('--processes', type=int, default=None, help="Worker processes inside a stage")
+    parser.add_argument('--cache', default=CACHE_PATH)
+    parser.add_argument('--build-dir', default=BUILD_DIR, help="Directory of the stage outputs")
+    parser.add_argument('--list', action='store_true', help="Only list the stages")
+    args = parser.parse_args()
+
+    try:
+        stages = default_stages(args.processes, args.build_dir)
+        pipeline = Pipeline(stages, args.cache)
+        if args.list:
+            for name in pipeline.required():
+                print(f"{name}: {', '.join(stages[name].inputs)} -> {', '.join(stages[name].outputs) or '(maps)'}")
+            return
+        unknown = [t for t in args.targets if t not in stages]
+        if unknown:
+            parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+        print("-" * 30)
+        status = pipeline.run(args.targets or None, args.force, args.jobs)
+        print("-" * 30)
+        print(f"Pipeline complete! {sum(s != 'cached' for s in status.values())} of {len(status)} stages ran")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
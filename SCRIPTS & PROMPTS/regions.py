@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from geocoder import Gazetteer
+from hotspot_clustering import load_layers
+
+
+REGIONS_FILE = "historical_regions.geojson"
+HAJDUK_DIR = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA"
+GAZETTEER_FILE = f"{HAJDUK_DIR}/1_LISTA DARIAH GEOBROWSER PROJECT_romane haiducesti Romania.csv"
+OCCURRENCES_FILE = f"{HAJDUK_DIR}/3_GIS toponyms_cities_FILTRATE_data2.csv"
+
+OUTSIDE = 'outside'
+# Occurrences without coordinates (not geocoded), kept apart from the points outside every region
+UNRESOLVED = 'unresolved'
+
+
+def load_regions(path: str = REGIONS_FILE, name_property: str = 'region') -> dict:
+    """
+    Reads the historical region polygons from a GeoJSON file.
+
+    Returns:
+        dict: Region name -> list of polygons, each polygon a list of rings
+        (float64 arrays of shape (n, 2) with lon/lat; the first ring is the outer one).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        collection = json.load(f)
+    regions = {}
+    for feature in collection['features']:
+        geometry = feature['geometry']
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        regions.setdefault(feature['properties'][name_property], []).extend(
+            [np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon] for polygon in polygons
+        )
+    return regions
+
+
+def points_in_ring(lon, lat, ring: np.ndarray) -> np.ndarray:
+    """
+    Even-odd ray casting for whole coordinate arrays: loops over the ring's
+    edges only, every edge is tested against all points at once.
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    inside = np.zeros(lon.shape, dtype=bool)
+    x1, y1 = ring[:, 0], ring[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    for ax, ay, bx, by in zip(x1, y1, x2, y2):
+        crosses = (ay > lat) != (by > lat)
+        if not crosses.any():
+            continue
+        x_cross = ax + (lat[crosses] - ay) * (bx - ax) / (by - ay)
+        inside[crosses] ^= lon[crosses] < x_cross
+    return inside
+
+
+def points_in_polygon(lon, lat, polygon: list) -> np.ndarray:
+    """
+    Tests whole coordinate arrays against a polygon (outer ring plus holes).
+    Points outside the polygon's bounding box are rejected before ray casting.
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    outer = polygon[0]
+    (min_lon, min_lat), (max_lon, max_lat) = outer.min(axis=0), outer.max(axis=0)
+    candidates = np.flatnonzero((lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat))
+    inside = np.zeros(lon.shape, dtype=bool)
+    if candidates.size:
+        hit = points_in_ring(lon[candidates], lat[candidates], outer)
+        for hole in polygon[1:]:
+            hit &= ~points_in_ring(lon[candidates], lat[candidates], hole)
+        inside[candidates] = hit
+    return inside
+
+
+def points_in_regions(lon, lat, regions: dict) -> np.ndarray:
+    """True for the points that fall inside any of the regions."""
+    inside = np.zeros(np.shape(lon), dtype=bool)
+    for polygons in regions.values():
+        for polygon in polygons:
+            inside |= points_in_polygon(lon, lat, polygon)
+    return inside
+
+
+def assign_regions(lon, lat, regions: dict) -> np.ndarray:
+    """
+    Name of the region of every point (OUTSIDE when it is in none of them).
+    Each region only ray-casts the points left unassigned that fall inside its
+    bounding box, so the cost shrinks as points get assigned.
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    assigned = np.full(lon.shape, OUTSIDE, dtype=object)
+    pending = np.flatnonzero(~(np.isnan(lon) | np.isnan(lat)))
+    for name, polygons in regions.items():
+        if pending.size == 0:
+            break
+        inside = np.zeros(pending.shape, dtype=bool)
+        for polygon in polygons:
+            inside |= points_in_polygon(lon[pending], lat[pending], polygon)
+        assigned[pending[inside]] = name
+        pending = pending[~inside]
+    return assigned
+
+
+def region_layer_table(points: pd.DataFrame, regions: dict) -> pd.DataFrame:
+    """
+    Region x layer point counts, from a table with layer / Longitude / Latitude columns.
+    """
+    region = assign_regions(points['Longitude'], points['Latitude'], regions)
+    table = pd.crosstab(pd.Series(region, name='region'), points['layer'].to_numpy(), margins=True, margins_name='Total')
+    table.columns.name = 'layer'
+    return table
+
+
+def author_from_file(file_names: pd.Series) -> pd.Series:
+    """'HAIRO_PopescuND_RaduAnghel.txt' -> 'PopescuND'"""
+    return file_names.str.extract(r'^HAIRO_([^_]+)_', expand=False).fillna('unknown')
+
+
+def author_region_table(occurrences: pd.DataFrame, regions: dict) -> pd.DataFrame:
+    """
+    Author x region occurrence totals, from a geocoded occurrence table
+    (fisier / total_aparitii / Longitude / Latitude columns). Occurrences that
+    were not geocoded are counted in an 'unresolved' column, not as 'outside'.
+    """
+    region = assign_regions(occurrences['Longitude'], occurrences['Latitude'], regions)
+    region[(occurrences['Longitude'].isna() | occurrences['Latitude'].isna()).to_numpy()] = UNRESOLVED
+    return pd.crosstab(
+        author_from_file(occurrences['fisier']).rename('author'),
+        pd.Series(region, name='region', index=occurrences.index),
+        values=occurrences['total_aparitii'], aggfunc='sum', margins=True, margins_name='Total',
+    ).fillna(0).astype(int)
+
+
+def parse_layer_argument(value: str):
+    """'Name=path.csv' -> ('Name', 'path.csv')"""
+    name, sep, path = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Layer must be given as NAME=PATH, got '{value}'")
+    return name.strip(), path.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Region x layer and author x region tables.")
+    parser.add_argument('--regions', default=REGIONS_FILE)
+    parser.add_argument('--layer', action='append', type=parse_layer_argument,
+                        help="Layer to count, as NAME=PATH (CSV or XLSX). Can be repeated.")
+    parser.add_argument('--occurrences', default=OCCURRENCES_FILE)
+    parser.add_argument('--gazetteer', default=GAZETTEER_FILE)
+    parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args()
+
+    layer_files = dict(args.layer) if args.layer else {'Hajduk novels': args.gazetteer}
+
+    try:
+        regions = load_regions(args.regions)
+        os.makedirs(args.output_dir, exist_ok=True)
+
+        layers_table = region_layer_table(load_layers(layer_files), regions)
+        layers_file = os.path.join(args.output_dir, 'region_x_layer.csv')
+        layers_table.to_csv(layers_file, encoding='utf-8-sig')
+
+        occurrences = pd.read_csv(args.occurrences, encoding='utf-8-sig')
+        geocoded = pd.concat([occurrences, Gazetteer.from_file(args.gazetteer).geocode(occurrences['cuvant'])], axis=1)
+        authors_table = author_region_table(geocoded, regions)
+        authors_file = os.path.join(args.output_dir, 'author_x_region.csv')
+        authors_table.to_csv(authors_file, encoding='utf-8-sig')
+
+        print("-" * 30)
+        print("Region x layer:")
+        print(layers_table)
+        print(f"Saved to '{layers_file}'")
+        print(f"Author x region saved to '{authors_file}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
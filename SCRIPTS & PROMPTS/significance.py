@@ -0,0 +1,250 @@
+import argparse
+import json
+from multiprocessing import Pool
+
+import numpy as np
+
+from regions import REGIONS_FILE, load_regions, parse_layer_argument, points_in_regions
+from spatial_index import EARTH_RADIUS_KM, SpatialIndex, read_layer
+
+
+HAJDUK_LAYER = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA/1_LISTA DARIAH GEOBROWSER PROJECT_romane haiducesti Romania.csv"
+SIMULATIONS_PER_TASK = 250
+# Standard error constant of the Clark-Evans test (no edge correction)
+CLARK_EVANS_SE = 0.26136
+
+
+def polygon_area_km2(ring: np.ndarray) -> float:
+    """Area of a lon/lat ring (shoelace formula on an equirectangular projection at its mean latitude)."""
+    lat0 = np.radians(ring[:, 1].mean())
+    x = np.radians(ring[:, 0]) * np.cos(lat0) * EARTH_RADIUS_KM
+    y = np.radians(ring[:, 1]) * EARTH_RADIUS_KM
+    return 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def regions_area_km2(regions: dict) -> float:
+    """Total area of the region polygons, holes subtracted."""
+    return sum(polygon_area_km2(polygon[0]) - sum(polygon_area_km2(hole) for hole in polygon[1:])
+               for polygons in regions.values() for polygon in polygons)
+
+
+def clark_evans(lon, lat, area_km2: float) -> dict:
+    """
+    Clark-Evans nearest-neighbour index of one layer. R < 1 means clustered,
+    R > 1 dispersed; z is the normal approximation (no edge correction).
+    """
+    n = len(lon)
+    if n < 2:
+        return {'n': n, 'observed_km': float('nan'), 'expected_km': float('nan'), 'R': float('nan'), 'z': float('nan')}
+    distances, _ = SpatialIndex(lon, lat).query_knn(lon, lat, k=2)
+    observed = distances[:, 1].mean()
+    density = n / area_km2
+    expected = 0.5 / np.sqrt(density)
+    z = (observed - expected) / (CLARK_EVANS_SE / np.sqrt(n * density))
+    return {'n': n, 'observed_km': float(observed), 'expected_km': float(expected),
+            'R': float(observed / expected), 'z': float(z)}
+
+
+def cross_l(index: SpatialIndex, lon, lat, radii_km, area_km2: float) -> np.ndarray:
+    """
+    Cross-L function of points (lon, lat) towards the indexed layer:
+    K(r) = area / (n_a * n_b) * #pairs within r, L(r) = sqrt(K(r) / pi).
+    Under independence L(r) ~ r; larger values mean attraction.
+    """
+    pairs = index.count_within(lon, lat, radii_km).sum(axis=0)
+    k = area_km2 * pairs / (len(lon) * len(index))
+    return np.sqrt(k / np.pi)
+
+
+class NullModel:
+    """
+    Random placements of n points, drawn in batches of simulations:
+
+    - 'uniform': uniformly over the surface of the region polygons;
+    - 'candidates': random subsets of a fixed set of candidate locations
+      (e.g. every locality of the gazetteer), a constrained permutation test.
+    """
+
+    def __init__(self, n: int, regions: dict = None, candidates: tuple = None):
+        if candidates is not None and n > len(candidates[0]):
+            raise ValueError(f"Cannot draw {n} points from {len(candidates[0])} candidate locations")
+        self.n = n
+        self.regions = regions
+        self.candidates = candidates
+        if regions is not None:
+            rings = np.concatenate([polygon[0] for polygons in regions.values() for polygon in polygons])
+            self.bbox = rings.min(axis=0), rings.max(axis=0)
+
+    def sample(self, rng: np.random.Generator, simulations: int) -> tuple:
+        """
+        Returns:
+            tuple: (lon, lat), each of shape (simulations, n).
+        """
+        if self.candidates is not None:
+            cand_lon, cand_lat = self.candidates
+            chosen = rng.random((simulations, len(cand_lon))).argpartition(self.n - 1, axis=1)[:, :self.n]
+            return cand_lon[chosen], cand_lat[chosen]
+
+        needed = simulations * self.n
+        (min_lon, min_lat), (max_lon, max_lat) = self.bbox
+        lon, lat = np.empty(0), np.empty(0)
+        while len(lon) < needed:
+            batch = 2 * (needed - len(lon)) + 64
+            # Uniform in sin(latitude) is uniform in area on the sphere
+            new_lon = rng.uniform(min_lon, max_lon, batch)
+            new_lat = np.degrees(np.arcsin(rng.uniform(np.sin(np.radians(min_lat)), np.sin(np.radians(max_lat)), batch)))
+            inside = points_in_regions(new_lon, new_lat, self.regions)
+            lon = np.concatenate((lon, new_lon[inside]))
+            lat = np.concatenate((lat, new_lat[inside]))
+        return lon[:needed].reshape(simulations, self.n), lat[:needed].reshape(simulations, self.n)
+
+
+_worker_index = None
+_worker_null = None
+
+
+def _init_worker(evidence, null_model):
+    # The evidence index is built once per worker and reused by every simulation
+    global _worker_index, _worker_null
+    _worker_index = SpatialIndex(*evidence)
+    _worker_null = null_model
+
+
+def _simulate(task):
+    """Runs a batch of simulations with its own seed; returns mean NN distances and cross-L values."""
+    seed, simulations, radii_km, area_km2 = task
+    rng = np.random.default_rng(seed)
+    lon, lat = _worker_null.sample(rng, simulations)
+    distances, _ = _worker_index.query_knn(lon.ravel(), lat.ravel())
+    mean_nn = distances[:, 0].reshape(simulations, -1).mean(axis=1)
+    counts = _worker_index.count_within(lon.ravel(), lat.ravel(), radii_km).reshape(simulations, -1, len(radii_km))
+    l_values = np.sqrt(area_km2 * counts.sum(axis=1) / (lon.shape[1] * len(_worker_index)) / np.pi)
+    return mean_nn, l_values
+
+
+def monte_carlo_test(points: tuple, evidence: tuple, null_model: NullModel, area_km2: float,
+                     radii_km=(5, 10, 25, 50), simulations: int = 9999, seed: int = 0,
+                     processes: int = None) -> dict:
+    """
+    Tests whether points lie closer to the evidence layer than the null model predicts.
+
+    The simulations are split in batches; every batch gets its own child seed of
+    one SeedSequence, so results are reproducible whatever the number of processes.
+
+    Args:
+        points (tuple): (lon, lat) arrays of the tested layer (e.g. literary places).
+        evidence (tuple): (lon, lat) arrays of the documentary layer.
+
+    Returns:
+        dict: Observed statistics, one-sided p-values and the simulation envelopes of L.
+    """
+    if len(points[0]) == 0 or len(evidence[0]) == 0:
+        raise ValueError("Both the points and the evidence layer need at least one point")
+    radii_km = np.asarray(radii_km, dtype=np.float64)
+    index = SpatialIndex(*evidence)
+    observed_nn = float(index.query_knn(*points)[0][:, 0].mean())
+    observed_l = cross_l(index, points[0], points[1], radii_km, area_km2)
+
+    batches = [SIMULATIONS_PER_TASK] * (simulations // SIMULATIONS_PER_TASK)
+    if simulations % SIMULATIONS_PER_TASK:
+        batches.append(simulations % SIMULATIONS_PER_TASK)
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    tasks = [(s, b, radii_km, area_km2) for s, b in zip(seeds, batches)]
+
+    with Pool(processes, initializer=_init_worker, initargs=(evidence, null_model)) as pool:
+        results = pool.map(_simulate, tasks)
+    simulated_nn = np.concatenate([nn for nn, _ in results])
+    simulated_l = np.concatenate([l for _, l in results])
+
+    return {
+        'simulations': simulations,
+        'seed': seed,
+        'mean_nn_km': observed_nn,
+        'mean_nn_expected_km': float(simulated_nn.mean()),
+        # Closer than chance: small distances are extreme
+        'p_nn': float((1 + (simulated_nn <= observed_nn).sum()) / (simulations + 1)),
+        'radii_km': radii_km.tolist(),
+        'cross_L': observed_l.tolist(),
+        'cross_L_low': np.percentile(simulated_l, 2.5, axis=0).tolist(),
+        'cross_L_high': np.percentile(simulated_l, 97.5, axis=0).tolist(),
+        # Attraction: large L values are extreme
+        'p_cross_L': ((1 + (simulated_l >= observed_l).sum(axis=0)) / (simulations + 1)).tolist(),
+    }
+
+
+def layer_coordinates(path: str, regions: dict = None) -> tuple:
+    """(lon, lat) of a layer; with regions, only the points inside the study area."""
+    df = read_layer(path)
+    lon, lat = df['Longitude'].to_numpy(np.float64), df['Latitude'].to_numpy(np.float64)
+    if regions is not None:
+        inside = points_in_regions(lon, lat, regions)
+        lon, lat = lon[inside], lat[inside]
+    return lon, lat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte-Carlo test: are the points closer to the evidence than chance?")
+    parser.add_argument('--points', type=parse_layer_argument, default=('Hajduk novels', HAJDUK_LAYER),
+                        help="Tested layer as NAME=PATH")
+    parser.add_argument('--evidence', type=parse_layer_argument, action='append', required=True,
+                        help="Documentary layer as NAME=PATH. Can be repeated.")
+    parser.add_argument('--candidates', help="Draw random placements from these locations instead of uniformly")
+    parser.add_argument('--regions', default=REGIONS_FILE)
+    parser.add_argument('--radii', type=float, nargs='+', default=[5, 10, 25, 50], help="Cross-L radii in km")
+    parser.add_argument('--simulations', type=int, default=9999)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--output', default='significance.json')
+    args = parser.parse_args()
+
+    try:
+        regions = load_regions(args.regions)
+        area = regions_area_km2(regions)
+        name, path = args.points
+        # Every layer is clipped to the study area: the null model only places points
+        # inside it, and the Clark-Evans density divides by its area
+        points = layer_coordinates(path, regions)
+        if len(points[0]) == 0:
+            print(f"ERROR: No point of '{path}' falls inside the study area.")
+            return
+
+        candidates = None
+        if args.candidates:
+            candidates = layer_coordinates(args.candidates, regions)
+            if len(candidates[0]) < len(points[0]):
+                print(f"ERROR: Only {len(candidates[0])} candidate locations inside the study area "
+                      f"for {len(points[0])} points.")
+                return
+        null_model = NullModel(len(points[0]), regions=regions, candidates=candidates)
+
+        report = {'points': name, 'study_area_km2': area,
+                  'clark_evans': {name: clark_evans(*points, area)}, 'tests': {}}
+        print("-" * 30)
+        print(f"{name}: {len(points[0])} points in the study area ({area:,.0f} km²)")
+        print(f"  Clark-Evans R = {report['clark_evans'][name]['R']:.3f}, z = {report['clark_evans'][name]['z']:.2f}")
+        for evidence_name, evidence_path in args.evidence:
+            evidence = layer_coordinates(evidence_path, regions)
+            if len(evidence[0]) == 0:
+                print(f"vs {evidence_name}: no point inside the study area, skipped")
+                continue
+            report['clark_evans'][evidence_name] = clark_evans(*evidence, area)
+            result = monte_carlo_test(points, evidence, null_model, area, args.radii,
+                                      args.simulations, args.seed, args.processes)
+            report['tests'][evidence_name] = result
+            print(f"vs {evidence_name}: mean NN {result['mean_nn_km']:.2f} km "
+                  f"(null {result['mean_nn_expected_km']:.2f} km), p = {result['p_nn']:.4f}")
+            for r, l, p in zip(result['radii_km'], result['cross_L'], result['p_cross_L']):
+                print(f"  L({r:g} km) = {l:.2f}, p = {p:.4f}")
+
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report has been saved to '{args.output}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
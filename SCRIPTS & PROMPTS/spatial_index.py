@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# The layer files were typed by hand, so the same column has several spellings
+LAYER_COLUMN_ALIASES = {
+    'Forest Name': 'Name',
+    'Adress': 'Address',
+}
+
+
+def normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
+    """Strips the headers and applies the usual header aliases."""
+    return df.rename(columns=lambda c: str(c).strip()).rename(columns=LAYER_COLUMN_ALIASES)
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Reads a CSV or XLSX file (its first sheet) with normalized headers."""
+    if path.lower().endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(path)
+    else:
+        df = pd.read_csv(path, encoding='utf-8-sig')
+    return normalize_headers(df)
+
+
+def read_sheets(path: str) -> dict:
+    """
+    Reads every sheet of an XLSX file (a CSV is a single sheet named None),
+    with normalized headers.
+
+    Returns:
+        dict: Sheet name -> DataFrame, in workbook order.
+    """
+    if path.lower().endswith(('.xlsx', '.xls')):
+        return {sheet: normalize_headers(df) for sheet, df in pd.read_excel(path, sheet_name=None).items()}
+    return {None: read_table(path)}
+
+
+def clean_coordinates(df: pd.DataFrame, source: str = None) -> pd.DataFrame:
+    """
+    Makes Longitude / Latitude numeric and validates them (coordinate_validation.repair_layer):
+    a file whose axes are swapped is swapped back, and the rows without valid coordinates
+    (missing, not a number, or outside [-180, 180] x [-90, 90], e.g. '23303' typed without
+    its decimal point) are dropped. What was repaired is printed, prefixed with source.
+    """
+    # Imported here: coordinate_validation uses regions, which imports this module
+    from coordinate_validation import describe_repairs, repair_layer
+
+    df, summary = repair_layer(df)
+    repairs = describe_repairs(summary)
+    if repairs:
+        print(f"{source or 'Layer'}: {repairs}")
+    return df
+
+
+def read_layer(path: str) -> pd.DataFrame:
+    """
+    Reads a point layer (CSV or XLSX) and normalizes its headers to
+    Name / Address / Longitude / Latitude. Swapped axes are repaired and rows
+    without valid or in-range coordinates are dropped (see clean_coordinates).
+    """
+    return clean_coordinates(read_table(path), path)
+
+
+def lonlat_to_xyz(lon, lat) -> np.ndarray:
+    """Converts degrees to 3D points on the unit sphere, shape (n, 3)."""
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def haversine_km(lon1, lat1, lon2, lat2):
+    """Great-circle distance in km; the arguments broadcast like NumPy arrays."""
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def km_to_chord(distance_km):
+    """Great-circle distance -> straight-line distance between unit-sphere points."""
+    return 2 * np.sin(np.asarray(distance_km, dtype=np.float64) / (2 * EARTH_RADIUS_KM))
+
+
+def chord_to_km(chord):
+    """Straight-line distance between unit-sphere points -> great-circle distance."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord, dtype=np.float64) / 2, 0.0, 1.0))
+
+
+class SpatialIndex:
+    """
+    KD-tree over the unit-sphere coordinates of one layer.
+
+    On the sphere a radius in km is an exact chord length, so radius and
+    k-nearest queries need no distance matrix and no projection.
+    """
+
+    def __init__(self, lon, lat):
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.tree = cKDTree(lonlat_to_xyz(self.lon, self.lat))
+
+    @classmethod
+    def from_layer(cls, df: pd.DataFrame) -> 'SpatialIndex':
+        return cls(df['Longitude'].to_numpy(), df['Latitude'].to_numpy())
+
+    def __len__(self):
+        return len(self.lon)
+
+    def query_radius(self, lon, lat, radius_km: float) -> list:
+        """Indices of the layer points within radius_km of each query point."""
+        points = lonlat_to_xyz(np.atleast_1d(lon), np.atleast_1d(lat))
+        return [np.asarray(idx, dtype=np.intp) for idx in self.tree.query_ball_point(points, km_to_chord(radius_km))]
+
+    def count_within(self, lon, lat, radii_km) -> np.ndarray:
+        """
+        Number of layer points within each radius of each query point.
+
+        Returns:
+            np.ndarray: Counts with shape (number of query points, number of radii).
+        """
+        points = lonlat_to_xyz(np.atleast_1d(lon), np.atleast_1d(lat))
+        counts = [
+            self.tree.query_ball_point(points, km_to_chord(radius), return_length=True)
+            for radius in np.atleast_1d(radii_km)
+        ]
+        return np.column_stack(counts).astype(np.int64)
+
+    def query_knn(self, lon, lat, k: int = 1):
+        """
+        k nearest layer points of each query point.
+
+        Returns:
+            tuple: (distances in km, indices), both with shape (number of query points, k);
+            k is capped at the number of layer points, so an empty layer gives empty arrays.
+        """
+        points = lonlat_to_xyz(np.atleast_1d(lon), np.atleast_1d(lat))
+        k = min(k, len(self))
+        if k == 0 or len(points) == 0:
+            return np.zeros((len(points), k)), np.zeros((len(points), k), dtype=np.intp)
+        chord, idx = self.tree.query(points, k=k)
+        return chord_to_km(chord).reshape(len(points), k), np.asarray(idx).reshape(len(points), k)
@@ -0,0 +1,236 @@
+import argparse
+import csv
+import os
+import zipfile
+
+import numpy as np
+
+
+# Sizes at scale 1, close to the real data (~100 novels of ~35k words, 7k layer points)
+BASE_SIZES = {
+    'novels': 100,
+    'novel_words': 35000,
+    'toponyms': 500,
+    'occurrence_rows': 1000,
+    'forest_lines': 1000,
+    'dictionary_pages': 50,
+    'points': 7000,
+}
+# Longitude / latitude box of Romania
+ROMANIA_BBOX = (20.3, 43.6, 29.7, 48.2)
+
+ONSETS = ['', 'b', 'c', 'd', 'f', 'g', 'h', 'j', 'l', 'm', 'n', 'p', 'r', 's', 'ș', 't', 'ț', 'v', 'z',
+          'br', 'cr', 'dr', 'gr', 'pl', 'str', 'ch', 'gh']
+VOWELS = ['a', 'e', 'i', 'o', 'u', 'ă', 'â', 'î', 'ea', 'oa', 'ia', 'iu']
+CODAS = ['', '', '', 'n', 'r', 's', 't', 'l', 'm', 'nt', 'rt', 'ș']
+FOREST_WORDS = ['pădure', 'pădurea', 'codru', 'codrii', 'fitonim', 'dendronim']
+# The dictionary PDF uses a standard PDF font, which has no ă, ș and ț
+PDF_FOLD = str.maketrans('ășşțţĂȘŞȚŢ', 'assttASSTT')
+
+
+def make_word(rng: np.random.Generator, syllables: int) -> str:
+    return ''.join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS) for _ in range(syllables))
+
+
+def make_vocabulary(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Romanian-looking lowercase words (1 to 4 syllables)."""
+    words = {make_word(rng, int(rng.integers(1, 5))) for _ in range(size * 2)}
+    return np.array(sorted(words)[:size], dtype=object)
+
+
+def make_toponyms(rng: np.random.Generator, size: int) -> list:
+    """Capitalized place names; about one in ten has two words ('Valea Xyz')."""
+    names = set()
+    while len(names) < size:
+        name = make_word(rng, int(rng.integers(2, 4))).capitalize()
+        if rng.random() < 0.1:
+            name = f"{rng.choice(['Valea', 'Piatra', 'Câmpu', 'Gura'])} {name}"
+        names.add(name)
+    return sorted(names)
+
+
+def write_gazetteer(path: str, toponyms: list):
+    """Gazetteer CSV with a Name column, as the DARIAH list."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name'])
+        writer.writerows([name] for name in toponyms)
+
+
+def write_corpus_zip(path: str, rng: np.random.Generator, n_novels: int, words_per_novel: int,
+                     toponyms: list, toponym_rate: float = 0.002) -> list:
+    """
+    Zip of novels laid out as the HAI-RO corpus (HAI-RO_txt/HAIRO_<Author>_<Title>.txt).
+    Word frequencies follow a Zipf law; toponyms are sprinkled at toponym_rate.
+
+    Returns:
+        list: The novel file names.
+    """
+    vocabulary = make_vocabulary(rng, 20000)
+    ranks = np.arange(1, len(vocabulary) + 1)
+    probabilities = 1 / ranks / (1 / ranks).sum()
+    toponyms = np.array(toponyms, dtype=object)
+    names = []
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for i in range(n_novels):
+            words = vocabulary[rng.choice(len(vocabulary), words_per_novel, p=probabilities)]
+            places = rng.random(words_per_novel) < toponym_rate
+            words[places] = toponyms[rng.integers(0, len(toponyms), places.sum())]
+            # Sentences of 12 words on average
+            ends = rng.random(words_per_novel) < 1 / 12
+            words[ends] = words[ends] + '.'
+            name = f"HAIRO_Autor{i % 17:02d}_Roman{i:05d}.txt"
+            archive.writestr(f"HAI-RO_txt/{name}", ' '.join(words))
+            names.append(name)
+    return names
+
+
+def write_occurrence_table(path: str, rng: np.random.Generator, n_rows: int, toponyms: list, novels: list,
+                           noise_words: list = ()):
+    """
+    Occurrence table with the columns of data.csv. About a fifth of the words
+    are lowercase or blacklisted noise, so that filtering has work to do.
+    """
+    vocabulary = make_vocabulary(rng, 2000)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['cuvant', 'fisier', 'total_aparitii', 'contexte'])
+        for _ in range(n_rows):
+            draw = rng.random()
+            if draw < 0.1 and len(noise_words):
+                word = noise_words[rng.integers(len(noise_words))]
+            elif draw < 0.2:
+                word = vocabulary[rng.integers(len(vocabulary))]
+            else:
+                word = toponyms[rng.integers(len(toponyms))]
+            count = int(rng.zipf(2.0))
+            context = ' '.join(vocabulary[rng.integers(0, len(vocabulary), 11)])
+            writer.writerow([word, novels[rng.integers(len(novels))], count, ' ||| '.join([context] * min(count, 5))])
+
+
+def random_points(rng: np.random.Generator, n: int, clusters: int = 40) -> tuple:
+    """Clustered points over Romania (half around cluster centres, half uniform)."""
+    min_lon, min_lat, max_lon, max_lat = ROMANIA_BBOX
+    centres = np.column_stack((rng.uniform(min_lon, max_lon, clusters), rng.uniform(min_lat, max_lat, clusters)))
+    clustered = n // 2
+    pick = rng.integers(0, clusters, clustered)
+    lon = np.concatenate((centres[pick, 0] + rng.normal(0, 0.15, clustered), rng.uniform(min_lon, max_lon, n - clustered)))
+    lat = np.concatenate((centres[pick, 1] + rng.normal(0, 0.1, clustered), rng.uniform(min_lat, max_lat, n - clustered)))
+    return np.clip(lon, min_lon, max_lon), np.clip(lat, min_lat, max_lat)
+
+
+def write_point_layer(path: str, rng: np.random.Generator, n_points: int, prefix: str = 'Loc'):
+    """Point layer CSV with Name, Longitude and Latitude columns."""
+    lon, lat = random_points(rng, n_points)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name', 'Longitude', 'Latitude'])
+        writer.writerows((f"{prefix} {i}", f"{x:.6f}", f"{y:.6f}") for i, (x, y) in enumerate(zip(lon, lat)))
+
+
+def write_forest_docx(path: str, rng: np.random.Generator, n_lines: int, invalid_share: float = 0.01):
+    """
+    Word file in the format read by Transfer_Word_to_CSV: one
+    'Pădurea <nume>, <localitate>, <latitudine>, <longitudine>' paragraph per forest.
+    """
+    from docx import Document
+
+    lon, lat = random_points(rng, n_lines)
+    vocabulary = make_vocabulary(rng, 3000)
+    document = Document()
+    for i in range(n_lines):
+        name = f"Pădurea {vocabulary[rng.integers(len(vocabulary))].capitalize()}_{i}"
+        place = vocabulary[rng.integers(len(vocabulary))].capitalize()
+        if rng.random() < invalid_share:
+            document.add_paragraph(f"{name}, {place}, coordonate lipsă")
+        else:
+            document.add_paragraph(f"{name}, {place}, {lat[i]}, {lon[i]}")
+    document.save(path)
+
+
+def write_dictionary_pdf(path: str, rng: np.random.Generator, n_pages: int, entries_per_page: int = 8):
+    """
+    Toponymic-dictionary-like PDF: uppercase headwords on their own line, followed by
+    paragraphs; about a third of the entries mention a forest keyword.
+    """
+    import fitz
+
+    vocabulary = make_vocabulary(rng, 3000)
+    document = fitz.open()
+    for _ in range(n_pages):
+        lines = []
+        for _ in range(entries_per_page):
+            lines.append(make_word(rng, int(rng.integers(2, 4))).upper().translate(PDF_FOLD))
+            for _ in range(int(rng.integers(1, 3))):
+                words = list(vocabulary[rng.integers(0, len(vocabulary), 24)])
+                if rng.random() < 0.33:
+                    words[int(rng.integers(len(words)))] = rng.choice(FOREST_WORDS)
+                text = ' '.join(words).translate(PDF_FOLD)
+                lines.extend([text[:90], text[90:]] if len(text) > 90 else [text])
+                lines.append('')
+        page = document.new_page()
+        page.insert_text((40, 40), '\n'.join(lines), fontsize=7)
+    document.save(path)
+    document.close()
+
+
+def generate_dataset(output_dir: str, scale: float = 1, seed: int = 0, kinds=None) -> dict:
+    """
+    Writes a synthetic dataset of the given scale (1 = today's data size).
+
+    Args:
+        kinds (list): Subset of 'corpus', 'occurrences', 'docx', 'pdf', 'points' (default: all).
+
+    Returns:
+        dict: Kind -> path of the generated file (plus 'gazetteer').
+    """
+    rng = np.random.default_rng(seed)
+    kinds = set(kinds or ('corpus', 'occurrences', 'docx', 'pdf', 'points'))
+    size = {key: max(1, int(round(value * scale))) for key, value in BASE_SIZES.items()}
+    size['novel_words'] = BASE_SIZES['novel_words']
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = {'gazetteer': os.path.join(output_dir, 'gazetteer.csv')}
+    toponyms = make_toponyms(rng, size['toponyms'])
+    write_gazetteer(paths['gazetteer'], toponyms)
+    novels = [f"HAIRO_Autor{i % 17:02d}_Roman{i:05d}.txt" for i in range(size['novels'])]
+
+    if 'corpus' in kinds:
+        paths['corpus'] = os.path.join(output_dir, 'corpus.zip')
+        write_corpus_zip(paths['corpus'], rng, size['novels'], size['novel_words'], toponyms)
+    if 'occurrences' in kinds:
+        from filter_localities import get_default_classifier
+        paths['occurrences'] = os.path.join(output_dir, 'occurrences.csv')
+        write_occurrence_table(paths['occurrences'], rng, size['occurrence_rows'], toponyms, novels,
+                               sorted(get_default_classifier().blacklist))
+    if 'docx' in kinds:
+        paths['docx'] = os.path.join(output_dir, 'forests.docx')
+        write_forest_docx(paths['docx'], rng, size['forest_lines'])
+    if 'pdf' in kinds:
+        paths['pdf'] = os.path.join(output_dir, 'dictionary.pdf')
+        write_dictionary_pdf(paths['pdf'], rng, size['dictionary_pages'])
+    if 'points' in kinds:
+        paths['points'] = os.path.join(output_dir, 'points.csv')
+        write_point_layer(paths['points'], rng, size['points'])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset for benchmarks.")
+    parser.add_argument('--scale', type=float, default=1, help="1 = today's data size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--kinds', nargs='+', choices=['corpus', 'occurrences', 'docx', 'pdf', 'points'])
+    parser.add_argument('--output-dir', default='synthetic_data')
+    args = parser.parse_args()
+
+    paths = generate_dataset(args.output_dir, args.scale, args.seed, args.kinds)
+    print("-" * 30)
+    print(f"Synthetic dataset (scale {args.scale:g}) complete!")
+    for kind, path in paths.items():
+        print(f"  {kind}: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print("-" * 30)
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()
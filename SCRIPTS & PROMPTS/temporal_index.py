@@ -0,0 +1,247 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from regions import parse_layer_argument
+from spatial_index import SpatialIndex, read_layer
+
+
+HAJDUK_LAYER = "../HAJDUK_NOVELS_DISTRIBUTION_OCCURENCES_CITIES ROMANIA/1_LISTA DARIAH GEOBROWSER PROJECT_romane haiducesti Romania.csv"
+# DARIAH GeoBrowser time columns: a single date, or the beginning and end of a span
+TIME_COLUMNS = ('TimeStamp', 'TimeSpan_b', 'TimeSpan_e')
+# Intervals per leaf of the interval tree; leaves are filtered with NumPy instead of descended
+LEAF_SIZE = 64
+# Year, then an optional month (1-12) and day (1-31) not followed by more digits,
+# so that a year range such as '1817-1820' is not read as year 1817, month 18
+DATE_PATTERN = r'^\s*(-?\d{1,4})(?:-(0?[1-9]|1[0-2])(?!\d)(?:-(0?[1-9]|[12]\d|3[01])(?!\d))?)?'
+# Year ranges: '1817-1820', '1817 – 1820'
+RANGE_PATTERN = r'^\s*-?\d{1,4}\s*[-–]\s*(\d{3,4})\s*$'
+
+
+def decimal_years(values) -> np.ndarray:
+    """
+    '1817', '1817-05', '1817-05-21' (or plain numbers) -> decimal years, NaN when missing.
+    A year range ('1817-1820') gives its first year.
+    Parsed by hand, since pandas timestamps cannot hold dates before 1677.
+    """
+    parts = pd.Series(values, dtype=object).astype(str).str.extract(DATE_PATTERN)
+    year = pd.to_numeric(parts[0], errors='coerce')
+    month = pd.to_numeric(parts[1], errors='coerce').fillna(1)
+    day = pd.to_numeric(parts[2], errors='coerce').fillna(1)
+    return (year + (month - 1) / 12 + (day - 1) / 365.25).to_numpy(np.float64)
+
+
+def decimal_year_spans(values) -> tuple:
+    """Start and end (decimal years) of each value: a year range gives its two years, a date itself twice."""
+    start = decimal_years(values)
+    last_year = pd.to_numeric(pd.Series(values, dtype=object).astype(str).str.extract(RANGE_PATTERN)[0],
+                              errors='coerce').to_numpy(np.float64)
+    return start, np.where(np.isnan(last_year), start, last_year)
+
+
+def time_intervals(df: pd.DataFrame, undated: str = 'always') -> tuple:
+    """
+    Start and end (decimal years) of every row of a layer. A TimeStamp is an
+    interval of length zero (a year range in it, a span); an open span end means
+    the point stays active.
+
+    Args:
+        undated (str): 'always' keeps rows without any date active at every time,
+            'never' excludes them from every time query.
+    """
+    empty = pd.Series([None] * len(df), index=df.index)
+    stamp, stamp_end = decimal_year_spans(df.get(TIME_COLUMNS[0], empty))
+    begin = decimal_years(df.get(TIME_COLUMNS[1], empty))
+    end = decimal_year_spans(df.get(TIME_COLUMNS[2], empty))[1]
+
+    start = np.where(np.isnan(begin), stamp, begin)
+    stop = np.where(np.isnan(end), np.where(np.isnan(begin), stamp_end, np.inf), end)
+    missing = np.isnan(start)
+    start[missing] = -np.inf if undated == 'always' else np.nan
+    stop[missing] = np.inf if undated == 'always' else np.nan
+    return start, stop
+
+
+class IntervalTree:
+    """
+    Static interval tree over arrays: intervals are sorted by start and a
+    segment tree keeps the largest end of every block. A query only visits
+    blocks that can still contain an overlapping interval, so it costs
+    O(log n + k) block visits instead of a scan of every interval.
+    """
+
+    def __init__(self, start, end):
+        start = np.asarray(start, dtype=np.float64)
+        end = np.asarray(end, dtype=np.float64)
+        valid = ~(np.isnan(start) | np.isnan(end))
+        ids = np.flatnonzero(valid)
+        order = np.argsort(start[ids], kind='stable')
+        self.ids = ids[order]
+        self.start = start[self.ids]
+        self.end = end[self.ids]
+
+        n_leaves = max(1, -(-len(self.ids) // LEAF_SIZE))
+        self.size = 1 << int(np.ceil(np.log2(n_leaves)))
+        self.max_end = np.full(2 * self.size, -np.inf)
+        if len(self.ids):
+            padded = np.full(self.size * LEAF_SIZE, -np.inf)
+            padded[:len(self.end)] = self.end
+            self.max_end[self.size:] = padded.reshape(self.size, LEAF_SIZE).max(axis=1)
+        for node in range(self.size - 1, 0, -1):
+            self.max_end[node] = max(self.max_end[2 * node], self.max_end[2 * node + 1])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def overlapping(self, t0: float, t1: float) -> np.ndarray:
+        """Ids (positions in the original arrays) of the intervals overlapping [t0, t1]."""
+        # Only intervals starting at or before t1 can overlap; they form a prefix
+        limit = np.searchsorted(self.start, t1, side='right')
+        if limit == 0:
+            return np.zeros(0, dtype=np.int64)
+        last_leaf = (limit - 1) // LEAF_SIZE
+        found = []
+        stack = [(1, 0, self.size - 1)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo > last_leaf or self.max_end[node] < t0:
+                continue
+            if lo == hi:
+                a, b = lo * LEAF_SIZE, min((lo + 1) * LEAF_SIZE, limit)
+                found.append(a + np.flatnonzero(self.end[a:b] >= t0))
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid + 1, hi))
+            stack.append((2 * node, lo, mid))
+        return np.sort(self.ids[np.concatenate(found)]) if found else np.zeros(0, dtype=np.int64)
+
+
+class TemporalIndex:
+    """
+    Dated points of several layers, indexed by time (IntervalTree) and by
+    space (SpatialIndex), built once and queried for any number of windows.
+    """
+
+    def __init__(self, points: pd.DataFrame):
+        self.points = points.reset_index(drop=True)
+        self.layers = self.points['layer'].to_numpy()
+        self.lon = self.points['Longitude'].to_numpy(np.float64)
+        self.lat = self.points['Latitude'].to_numpy(np.float64)
+        self.start = self.points['start'].to_numpy(np.float64)
+        self.end = self.points['end'].to_numpy(np.float64)
+        self.tree = IntervalTree(self.start, self.end)
+        self.spatial = SpatialIndex(self.lon, self.lat)
+
+    @classmethod
+    def from_layers(cls, layer_files: dict, undated: str = 'always') -> 'TemporalIndex':
+        """Builds the index from NAME -> CSV/XLSX path, reading every file once."""
+        frames = []
+        for layer_name, path in layer_files.items():
+            df = read_layer(path)
+            start, end = time_intervals(df, undated)
+            frames.append(pd.DataFrame({
+                'layer': layer_name,
+                'Name': df['Name'] if 'Name' in df else '',
+                'Longitude': df['Longitude'],
+                'Latitude': df['Latitude'],
+                'start': start,
+                'end': end,
+            }))
+        return cls(pd.concat(frames, ignore_index=True))
+
+    def query(self, t0: float = -np.inf, t1: float = np.inf, bbox=None, near=None, layers=None) -> np.ndarray:
+        """
+        Ids of the points active at some time in [t0, t1].
+
+        Args:
+            bbox (tuple): Optional (min_lon, min_lat, max_lon, max_lat).
+            near (tuple): Optional (lon, lat, radius_km).
+            layers (list): Optional layer names to keep.
+        """
+        ids = self.tree.overlapping(t0, t1)
+        if near is not None:
+            lon, lat, radius_km = near
+            ids = np.intersect1d(ids, self.spatial.query_radius([lon], [lat], radius_km)[0], assume_unique=True)
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            keep = (self.lon[ids] >= min_lon) & (self.lon[ids] <= max_lon) & \
+                   (self.lat[ids] >= min_lat) & (self.lat[ids] <= max_lat)
+            ids = ids[keep]
+        if layers is not None:
+            ids = ids[np.isin(self.layers[ids], list(layers))]
+        return ids
+
+    def select(self, t0: float = -np.inf, t1: float = np.inf, **kwargs) -> pd.DataFrame:
+        """Same as query, but returns the matching rows."""
+        return self.points.iloc[self.query(t0, t1, **kwargs)]
+
+    def time_slices(self, first: float, last: float, step: float, window: float = None) -> pd.DataFrame:
+        """
+        Active points per layer for a sequence of frames [t, t + window], t = first, first + step, ...
+
+        Counts come from two binary searches per frame (started minus already ended
+        intervals), so whole animation sequences cost no per-frame filtering.
+
+        Returns:
+            pd.DataFrame: One row per frame, one column per layer, indexed by frame start.
+        """
+        window = step if window is None else window
+        frame_start = np.arange(first, last + step / 2, step, dtype=np.float64)
+        frame_end = frame_start + window
+        dated = ~(np.isnan(self.start) | np.isnan(self.end))
+        counts = {}
+        for layer in pd.unique(self.layers):
+            mask = dated & (self.layers == layer)
+            starts, ends = np.sort(self.start[mask]), np.sort(self.end[mask])
+            started = np.searchsorted(starts, frame_end, side='right')
+            ended = np.searchsorted(ends, frame_start, side='left')
+            counts[layer] = started - ended
+        return pd.DataFrame(counts, index=pd.Index(frame_start, name='frame_start'))
+
+    def frames(self, first: float, last: float, step: float, window: float = None, **kwargs):
+        """Yields (frame start, rows active in the frame) for map sequences."""
+        window = step if window is None else window
+        for t in np.arange(first, last + step / 2, step, dtype=np.float64):
+            yield t, self.select(t, t + window, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query dated layers by time window and place.")
+    parser.add_argument('--layer', action='append', type=parse_layer_argument,
+                        help="Layer as NAME=PATH (CSV or XLSX). Can be repeated.")
+    parser.add_argument('--from', dest='t0', type=float, default=-np.inf, help="Window start (year)")
+    parser.add_argument('--to', dest='t1', type=float, default=np.inf, help="Window end (year)")
+    parser.add_argument('--bbox', type=float, nargs=4, metavar=('MIN_LON', 'MIN_LAT', 'MAX_LON', 'MAX_LAT'))
+    parser.add_argument('--near', type=float, nargs=3, metavar=('LON', 'LAT', 'RADIUS_KM'))
+    parser.add_argument('--undated', choices=['always', 'never'], default='always',
+                        help="Whether points without dates count as always active")
+    parser.add_argument('--slices', type=float, nargs=3, metavar=('FIRST', 'LAST', 'STEP'),
+                        help="Write per-layer counts of active points for each time slice")
+    parser.add_argument('--output', default='temporal_query.csv')
+    args = parser.parse_args()
+
+    layer_files = dict(args.layer) if args.layer else {'Hajduk novels': HAJDUK_LAYER}
+
+    try:
+        index = TemporalIndex.from_layers(layer_files, args.undated)
+        print("-" * 30)
+        if args.slices:
+            table = index.time_slices(*args.slices)
+            table.to_csv(args.output, encoding='utf-8-sig')
+            print(table)
+        else:
+            table = index.select(args.t0, args.t1, bbox=args.bbox, near=args.near)
+            table.to_csv(args.output, index=False, encoding='utf-8-sig')
+            print(f"{len(table)} of {len(index.points)} points active in [{args.t0}, {args.t1}]")
+            print(table['layer'].value_counts().to_string())
+        print(f"Result has been saved to '{args.output}'")
+        print("-" * 30)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: The file '{e.filename}' was not found.")
+
+
+# --- How to use it ---
+if __name__ == "__main__":
+    main()